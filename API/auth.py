@@ -1,15 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from datetime import datetime, timedelta
 from typing import Optional
+from collections import OrderedDict
 from jose import jwt
-from passlib.context import CryptContext
 from pydantic import BaseModel
 import os
+import threading
+import time
 
-from database import get_db
+from database import get_async_db
 from models import User
+from password_hashing import PasswordHashingBusy, password_hasher, pwd_context
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -18,7 +22,16 @@ SECRET_KEY = os.getenv("SECRET_KEY", "secret")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
 
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# --- User Cache Config ---
+# Each user's current (id, email, role) is cached this long; 0 disables the cache.
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "1024"))
+# Touched by invalidate_cached_user so other processes (e.g. create_admin.py -> API workers) drop their caches too.
+USER_CACHE_EPOCH_FILE = os.getenv(
+    "USER_CACHE_EPOCH_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "user_cache_epoch")
+)
+USER_CACHE_EPOCH_CHECK_SECONDS = 1.0
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 # --- Schemas ---
@@ -39,6 +52,13 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+async def _hash_off_loop(coro):
+    """Awaits a password_hasher call, turning saturation into a 503 instead of a stalled request."""
+    try:
+        return await coro
+    except PasswordHashingBusy as e:
+        raise HTTPException(status_code=503, detail=f"Authentication is busy, please retry. ({e})", headers={"Retry-After": "1"})
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -51,13 +71,15 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 
 # --- Endpoints ---
 
+# signup/login are async: the database is awaited and password hashing waits on the dedicated
+# hashing pool (password_hashing.password_hasher), so neither occupies a shared threadpool thread.
 @router.post("/signup", response_model=Token)
-def signup(user: UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.email == user.email).first()
+async def signup(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    db_user = await db.scalar(select(User).where(User.email == user.email))
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await _hash_off_loop(password_hasher.hash(user.password))
     # Allow role from request, default to "user" if not provided or invalid
     # Only allow "user" or "admin" roles
     allowed_roles = ["user", "admin"]
@@ -70,8 +92,8 @@ def signup(user: UserCreate, db: Session = Depends(get_db)):
         role=user_role
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
@@ -81,9 +103,9 @@ def signup(user: UserCreate, db: Session = Depends(get_db)):
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/login", response_model=Token)
-def login(role: str, form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(role: str, form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
     # Note: OAuth2PasswordRequestForm expects 'username', so we map email to it
-    user = db.query(User).filter(User.email == form_data.username).first()
+    user = await db.scalar(select(User).where(User.email == form_data.username))
     if not user:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     
@@ -91,7 +113,7 @@ def login(role: str, form_data: OAuth2PasswordRequestForm = Depends(), db: Sessi
     if user.role != role:
         raise HTTPException(status_code=401, detail=f"Access denied. You cannot log in as {role} with {user.role} credentials.")
 
-    if not verify_password(form_data.password, user.hashed_password):
+    if not await _hash_off_loop(password_hasher.verify(form_data.password, user.hashed_password)):
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -103,20 +125,154 @@ def login(role: str, form_data: OAuth2PasswordRequestForm = Depends(), db: Sessi
 
 from jose import JWTError
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
+# --- Principal & User Cache ---
+class Principal:
+    """
+    The authenticated caller: the user's current id, email and role, as resolved through `user_cache`.
+    Enough for authorization and ownership filters without loading the full User row.
+    """
+
+    __slots__ = ("id", "email", "role")
+
+    def __init__(self, id: int, email: str, role: str):
+        self.id = id
+        self.email = email
+        self.role = role
+
+
+_MISSING = object()
+
+
+class UserCache:
+    """
+    LRU + TTL cache of each user's current Principal keyed by email (None for an email with no user).
+
+    Lets every request see role changes and deleted users without a SELECT per request. Invalidation is
+    per process plus an epoch file whose mtime every process polls (at most once per second), so a
+    promotion done by create_admin.py reaches running API workers on the same host.
+    """
+
+    def __init__(self, ttl_seconds: float = USER_CACHE_TTL_SECONDS, max_entries: int = USER_CACHE_MAX_ENTRIES, epoch_file: str = USER_CACHE_EPOCH_FILE):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.epoch_file = epoch_file
+        self._lock = threading.Lock()
+        self._users: OrderedDict[str, tuple[float, Optional[Principal]]] = OrderedDict()
+        self._epoch = self._read_epoch()
+        self._epoch_checked_at = time.monotonic()
+
+    def _read_epoch(self) -> int:
+        try:
+            return os.stat(self.epoch_file).st_mtime_ns
+        except OSError:
+            return 0
+
+    def _check_epoch(self, now: float) -> None:
+        if now - self._epoch_checked_at < USER_CACHE_EPOCH_CHECK_SECONDS:
+            return
+        self._epoch_checked_at = now
+        epoch = self._read_epoch()
+        if epoch != self._epoch:
+            self._epoch = epoch
+            self._users.clear()
+
+    def peek(self, email: str):
+        """The cached Principal (or None for no such user), or _MISSING when nothing fresh is cached."""
+        now = time.monotonic()
+        with self._lock:
+            self._check_epoch(now)
+            entry = self._users.get(email)
+            if entry is not None and entry[0] > now:
+                self._users.move_to_end(email)
+                return entry[1]
+            self._users.pop(email, None)
+            return _MISSING
+
+    async def get(self, db: AsyncSession, email: str) -> Optional[Principal]:
+        cached = self.peek(email)
+        if cached is not _MISSING:
+            return cached
+        row = (await db.execute(select(User.id, User.email, User.role).where(User.email == email))).first()
+        principal = Principal(row.id, row.email, row.role) if row is not None else None
+        if self.ttl_seconds > 0:
+            with self._lock:
+                self._users[email] = (time.monotonic() + self.ttl_seconds, principal)
+                while len(self._users) > self.max_entries:
+                    self._users.popitem(last=False)
+        return principal
+
+    def invalidate(self, email: Optional[str] = None) -> None:
+        """Drops one user (or everyone) here and bumps the epoch file for other processes."""
+        with self._lock:
+            if email is None:
+                self._users.clear()
+            else:
+                self._users.pop(email, None)
+        try:
+            os.makedirs(os.path.dirname(self.epoch_file), exist_ok=True)
+            with open(self.epoch_file, "a"):
+                pass
+            os.utime(self.epoch_file, ns=(time.time_ns(), time.time_ns()))
+        except OSError as e:
+            print(f"Could not update user cache epoch file: {e}")
+        with self._lock:
+            # Our own bump must not clear the cache again on the next check.
+            self._epoch = self._read_epoch()
+
+
+user_cache = UserCache()
+
+
+def invalidate_cached_user(email: Optional[str] = None) -> None:
+    """Call after changing a user's role or deleting a user (see create_admin.py)."""
+    user_cache.invalidate(email)
+
+
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def _decode_token(token: str) -> Optional[dict]:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
-        raise credentials_exception
-    return user
+        return None
+    return payload if payload.get("sub") else None
+
+def principal_from_claims(token: str) -> Optional[Principal]:
+    """
+    The Principal for a valid token without a database lookup, for sync code outside a request session:
+    the cached user when `user_cache` has one, otherwise what the token's id/role claims assert.
+    """
+    payload = _decode_token(token)
+    if payload is None:
+        return None
+    cached = user_cache.peek(payload["sub"])
+    if cached is not _MISSING:
+        return cached
+    if payload.get("id") is None or not payload.get("role"):
+        return None
+    return Principal(int(payload["id"]), payload["sub"], payload["role"])
+
+async def principal_from_token(token: str, db: AsyncSession) -> Optional[Principal]:
+    """Resolves a bearer token to the user's current Principal; None for invalid tokens and deleted users."""
+    payload = _decode_token(token)
+    if payload is None:
+        return None
+    return await user_cache.get(db, payload["sub"])
+
+async def get_current_principal(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> Principal:
+    principal = await principal_from_token(token, db)
+    if principal is None:
+        raise _credentials_exception()
+    return principal
+
+@router.get("/hashing-metrics")
+def get_hashing_metrics(current_user: Principal = Depends(get_current_principal)):
+    """Counters and timings of the password hashing pool (admins only)."""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return password_hasher.metrics()
@@ -0,0 +1,34 @@
+import sys
+
+import pandas as pd
+
+from database import SessionLocal
+from models import Dataset
+from record_storage import load_records
+from ml.similarity_index import build_similarity_index
+
+
+def build_indexes(dataset_ids=None):
+    """Rebuilds the similar-patient index of every processed dataset (or only the given ids) offline."""
+    db = SessionLocal()
+    query = db.query(Dataset).filter(Dataset.is_processed == True)
+    if dataset_ids:
+        query = query.filter(Dataset.id.in_(dataset_ids))
+    datasets = query.all()
+    print(f"Building similarity indexes for {len(datasets)} datasets.")
+
+    for dataset in datasets:
+        rows = load_records(db, dataset.id)
+        if not rows:
+            print(f"No records found for {dataset.filename}. Skipping.")
+            continue
+        df = pd.DataFrame(rows)
+        target = (dataset.metadata_info or {}).get("suspected_target")
+        index = build_similarity_index(dataset.id, df, target)
+        print(f"{dataset.filename}: {len(index) if index else 0} vectors indexed.")
+
+    db.close()
+
+
+if __name__ == "__main__":
+    build_indexes([int(arg) for arg in sys.argv[1:]])
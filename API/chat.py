@@ -1,52 +1,56 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
-from database import get_db
-from models import User, ChatSession, ChatMessage, Dataset, Prediction
-from auth import get_current_user
+from pydantic import BaseModel
+from typing import Any, Dict
+from database import AsyncSessionLocal, get_async_db
+from models import ChatSession, ChatMessage, Dataset, Prediction
+from auth import Principal, get_current_principal, principal_from_token
+from chat_state import SessionState, session_store
+from dataset_index import disease_dataset_index
+from pagination import clamp_limit, keyset_page
 import json
+import re
 
-# Import the tabnet prediction logic (or refactor endpoints to share it)
-# For now, we'll try to reuse the model logic if possible, or reproduce simple logic
-from ml.tabnet_model import DiseasePredictionTabNet
+# Chat predictions use the per-dataset risk model, not the TabNet model endpoints.py serves
+from ml.risk_model import get_risk_model
+from ml.similarity_index import find_similar_patients, summarize_similar_patients
 # from endpoints import model, preprocessor # Circular import risk if not careful
 # Better to have a separate inference service, but for now we will keep it simple.
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
 @router.post("/start")
-def start_chat_session(
+async def start_chat_session(
     disease_context: str = "Heart Disease", # Default or user selected
-    current_user: User = Depends(get_current_user), 
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal), 
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Initiates a new chat session for a specific disease context.
     Finds the relevant dataset to determine questions to ask.
     """
     # 1. Find a dataset matching the disease context
-    # Search strategy: Try to find a dataset where filename contains the disease key words
-    # e.g. "Heart Disease" -> search for "heart"
+    # Search strategy: match the full disease name against dataset disease types, then its first
+    # word against filename/disease keywords, e.g. "Heart Disease" -> search for "heart"
     
     search_term = disease_context.split(" ")[0].lower() # Simple heuristic for now
     
-    # Try finding exact matches first
-    dataset = db.query(Dataset).filter(Dataset.filename.ilike(f"%{search_term}%"), Dataset.is_processed == True).first()
-    
-    if not dataset:
-        # Try broader search through all processed datasets
-        all_datasets = db.query(Dataset).filter(Dataset.is_processed == True).all()
-        # Check manually if any filename contains the term
-        for d in all_datasets:
-            if search_term in d.filename.lower():
-                dataset = d
-                break
+    # O(1) lookup in the disease/keyword -> dataset index (refreshed when uploads are processed)
+    dataset_id = await disease_dataset_index.lookup(db, disease_context)
+    dataset = await db.get(Dataset, dataset_id) if dataset_id is not None else None
+    if dataset_id is not None and dataset is None:
+        # Indexed dataset was deleted out from under us; rebuild once and retry.
+        await disease_dataset_index.rebuild(db)
+        dataset_id = await disease_dataset_index.lookup(db, disease_context)
+        dataset = await db.get(Dataset, dataset_id) if dataset_id is not None else None
     
     if not dataset:
         # Strict Mode: Do not fallback to unrelated datasets as it confuses the user.
         # Check if ANY prepared datasets exist to give a better error message
-        any_dataset = db.query(Dataset).filter(Dataset.is_processed == True).first()
-        if any_dataset:
+        if await disease_dataset_index.has_datasets(db):
              raise HTTPException(status_code=404, detail=f"No dataset found for '{disease_context}'. Please upload a CSV named '{search_term}.csv' or similar.")
         else:
              raise HTTPException(status_code=404, detail="No processed datasets available. Please upload a dataset in the Admin Dashboard.")
@@ -69,112 +73,323 @@ def start_chat_session(
         current_state=initial_state
     )
     db.add(session)
-    db.commit()
-    db.refresh(session)
+    await db.flush() # Assigns session.id without ending the transaction
     
-    # 3. Create Welcome Message
+    # 3. Create Welcome Message (same transaction as the session row)
     first_question = get_next_question(initial_state["missing_features"])
     welcome_text = f"Hello! I can help you assess your risk for {disease_context}. I'll need to ask you a few questions based on our {dataset.filename} data. First: {first_question}"
     
     msg = ChatMessage(session_id=session.id, sender="bot", content=welcome_text)
     db.add(msg)
-    db.commit()
+    session_id = session.id
+    await db.commit()
     
-    return {"session_id": session.id, "message": welcome_text}
+    session_store.put(SessionState(session_id, current_user.id, dataset.id, disease_context, "active", initial_state))
+    return {"session_id": session_id, "message": welcome_text}
+
+class ChatAnswersInput(BaseModel):
+    answers: Dict[str, Any]
 
 @router.post("/{session_id}/message")
-def send_message(
+async def send_message(
     session_id: int, 
     content: str, 
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    session = db.query(ChatSession).filter(ChatSession.id == session_id, ChatSession.user_id == current_user.id).first()
+    # Active sessions are served from the in-memory store; a miss rehydrates from the DB.
+    session = await session_store.get(db, session_id, current_user.id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
         
     if session.status == "completed":
         return {"response": "This session is completed. Please start a new one.", "status": "completed"}
     
-    # 1. Save User Message
-    user_msg = ChatMessage(session_id=session.id, sender="user", content=content)
-    db.add(user_msg)
+    # 1. Process Answer (Slot Filling)
+    answers = _answers_from_message(content, session.state)
+    if not answers:
+        # A JSON object naming none of the questions: ask the pending question again
+        return {
+            "response": f"I couldn't match that to any of my questions. {get_next_question(session.state.get('missing_features', []))}",
+            "status": session.status,
+            "filled": [],
+        }
     
-    # 2. Process Answer (Slot Filling)
-    state = dict(session.current_state) # Copy
-    missing = state.get("missing_features", [])
+    return (await _apply_answers(session, answers, content, current_user.id, db))[1]
+
+@router.post("/{session_id}/answers")
+async def submit_answers(
+    session_id: int,
+    payload: ChatAnswersInput,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Fills all supplied answers in one call (the form path of the UI).
+    Unknown feature names are ignored; the response is the same as for /message.
+    """
+    session = await session_store.get(db, session_id, current_user.id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
     
-    # Simple heuristic: The user answered the LAST asked question.
-    # In a real NLP app, we'd use an LLM or Entity Extraction to find WHICH feature was answered.
-    # Here: we assume the user answers the top of the 'missing' list from the previous turn.
+    if session.status == "completed":
+        return {"response": "This session is completed. Please start a new one.", "status": "completed"}
     
-    if missing:
-        just_answered_feature = missing[0]
-        # Store answer (Naively accept whatever they typed as the value)
-        # Try to convert to float if possible for the model
-        val = content
-        try:
-            val = float(content)
-        except:
-            pass # Keep as string
+    answers = _match_features(payload.answers, _known_features(session.state))
+    if not answers:
+        raise HTTPException(status_code=400, detail="None of the submitted answers match this session's questions")
+    
+    return (await _apply_answers(session, answers, _answers_summary(answers), current_user.id, db))[1]
+
+@router.websocket("/ws/{session_id}")
+async def chat_websocket(websocket: WebSocket, session_id: int, token: str = ""):
+    """
+    Guided chat over one WebSocket (/chat/ws/{session_id}?token=<access token>).
+    The token is checked and the session loaded once per connection instead of once per turn.
+    Each text frame is an answer in any form /message accepts, or {"answers": {...}} like /answers;
+    each gets one JSON frame back shaped like the REST response, the last one with the prediction.
+    """
+    session = await _open_websocket_session(token, session_id)
+    if session is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    await websocket.accept()
+    await websocket.send_json({
+        "session_id": session.id,
+        "status": session.status,
+        "response": get_next_question(session.state.get("missing_features", [])),
+    })
+    try:
+        while True:
+            content = await websocket.receive_text()
+            if session.status == "completed":
+                await websocket.send_json({"response": "This session is completed. Please start a new one.", "status": "completed"})
+                continue
             
-        state["collected_data"][just_answered_feature] = val
-        state["missing_features"] = missing[1:] # Pop the answered one
-        
-        session.current_state = state # Save back
-        db.add(session) # Mark dirty
+            answers, user_text = _answers_from_frame(content, session.state)
+            if not answers:
+                await websocket.send_json({"type": "error", "error": "None of the submitted answers match this session's questions", "status": session.status})
+                continue
+            try:
+                async with AsyncSessionLocal() as db:
+                    session, response = await _apply_answers(session, answers, user_text, session.user_id, db)
+            except Exception as e:
+                # Like a 500 on /message: this turn is lost (nothing was committed), the socket stays open
+                print(f"Chat turn failed for session {session.id}: {e}")
+                await websocket.send_json({"type": "error", "error": "Could not process this answer, please try again", "status": session.status})
+                continue
+            await websocket.send_json(response)
+    except WebSocketDisconnect:
+        pass
+
+async def _open_websocket_session(token: str, session_id: int):
+    async with AsyncSessionLocal() as db:
+        principal = await principal_from_token(token, db)
+        if principal is None:
+            return None
+        return await session_store.get(db, session_id, principal.id)
+
+def _answers_from_frame(content: str, state: dict):
+    """Returns (answers, text to record as the user message) for one WebSocket frame."""
+    try:
+        frame = json.loads(content)
+    except ValueError:
+        frame = None
+    if isinstance(frame, dict) and isinstance(frame.get("answers"), dict):
+        answers = _match_features(frame["answers"], _known_features(state))
+        return answers, _answers_summary(answers)
+    return _answers_from_message(content, state), content
+
+def _answers_from_message(content: str, state: dict) -> dict:
+    # A message may carry several answers ("age=54, cholesterol=230" or a JSON object); those fill
+    # every matching slot at once. Anything else answers the question asked last, i.e. missing[0];
+    # a JSON object never does, so one that matches no feature yields no answers.
+    answers = parse_answers(content, _known_features(state))
+    if not answers and _json_object(content) is None:
+        missing = state.get("missing_features", [])
+        answers = {missing[0]: _coerce_value(content)} if missing else {}
+    return answers
+
+def _answers_summary(answers: dict) -> str:
+    return ", ".join(f"{feature}={value}" for feature, value in answers.items())
+
+async def _apply_answers(session: SessionState, answers: dict, user_text: str, user_id: int, db: AsyncSession):
+    """
+    Records a user turn that answers one or more features, asks the next question or predicts,
+    and persists messages, new state and prediction in a single transaction.
+    Returns (new session state, response dict); shared by the REST and WebSocket transports.
+    """
+    db.add(ChatMessage(session_id=session.id, sender="user", content=user_text))
+    
+    # Build a new state instead of mutating the cached one, so a failed commit leaves the cache intact.
+    collected = {**(session.state.get("collected_data") or {}), **answers}
+    missing = [f for f in session.state.get("missing_features", []) if f not in answers]
+    state = {**session.state, "collected_data": collected, "missing_features": missing}
     
-    # 3. Determine Next Step
-    if not state["missing_features"]:
+    # 2. Determine Next Step
+    status = session.status
+    pred = None
+    if not missing:
         # ALL DONE -> PREDICT
-        prediction_result = run_prediction(state["collected_data"], session.dataset_id, db)
+        # May load the dataset's risk model from disk on a cache miss
+        prediction_result, risk_score = await run_in_threadpool(run_prediction, collected, session.dataset_id, db)
         
         bot_text = f"Thank you. Based on the data, your predicted risk result is: {prediction_result}. (This is an automated estimation)."
-        session.status = "completed"
+        status = "completed"
         
         # Save Prediction Record
         pred = Prediction(
-            user_id=current_user.id,
-            input_data=state["collected_data"],
-            risk_scores={"result": prediction_result}, # Simplified
+            user_id=user_id,
+            timestamp=datetime.utcnow(),
+            input_data=collected,
+            risk_scores={"result": prediction_result, "risk_score": risk_score},
+            risk_score=risk_score,
+            risk_label=prediction_result,
+            disease_type=session.disease_type,
             explanations={"source": "Chat Session"}
         )
         db.add(pred)
-        db.commit()
-        db.refresh(pred) # Get ID
         
     else:
         # Ask Next Question
-        next_feat = state["missing_features"][0]
+        next_feat = missing[0]
         bot_text = f"Got it. Next, what is your value for **{next_feat}**?"
         
-    bot_msg = ChatMessage(session_id=session.id, sender="bot", content=bot_text)
-    db.add(bot_msg)
-    db.commit()
+    db.add(ChatMessage(session_id=session.id, sender="bot", content=bot_text))
+    # Write the new state without loading the row; messages, state and prediction share one commit.
+    await db.execute(
+        update(ChatSession)
+        .where(ChatSession.id == session.id)
+        .values(current_state=state, status=status)
+        .execution_options(synchronize_session=False)
+    )
+    try:
+        await db.flush()
+        pred_id = pred.id if pred is not None else None
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        session_store.evict(session.id)
+        raise
     
-    response_data = {"response": bot_text, "status": session.status}
+    new_session = SessionState(session.id, session.user_id, session.dataset_id, session.disease_type, status, state)
+    session_store.put(new_session)
+    response_data = {"response": bot_text, "status": status, "filled": list(answers)}
     
-    if session.status == "completed" and 'pred' in locals():
+    if pred is not None:
          response_data["prediction"] = {
-             "id": pred.id,
+             "id": pred_id,
              "result": prediction_result,
+             "risk_score": risk_score,
              "timestamp": pred.timestamp.isoformat(),
-             "details": state["collected_data"]
+             "details": collected
          }
 
-    return response_data
+    return new_session, response_data
+
+# "feature=value" / "feature: value" pairs separated by commas, semicolons or new lines
+_PAIR_RE = re.compile(r"\s*([^=:,;\n]+?)\s*[=:]\s*([^,;\n]*?)\s*(?:[,;\n]|$)")
+
+def _known_features(state: dict) -> list:
+    # Pending questions first, then already answered ones (so a later message can correct them)
+    return list(state.get("missing_features", [])) + [f for f in (state.get("collected_data") or {}) if f not in state.get("missing_features", [])]
+
+def _coerce_value(value):
+    # Try to convert to float if possible for the model
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return value.strip()
+    return value
+
+def _match_features(raw: dict, features: list) -> dict:
+    """Maps user-supplied keys onto feature names (case, space and dash insensitive)."""
+    lookup = {_feature_key(f): f for f in features}
+    matched = {}
+    for key, value in raw.items():
+        feature = lookup.get(_feature_key(key))
+        if feature is not None and value is not None and value != "":
+            matched[feature] = _coerce_value(value)
+    return matched
+
+def _feature_key(name) -> str:
+    return re.sub(r"[\s\-]+", "_", str(name).strip().lower())
+
+def parse_answers(content: str, features: list) -> dict:
+    """
+    Extracts several answers from one message: a JSON object ({"age": 54, ...}) or
+    feature=value pairs ("age=54, cholesterol: 230"). Returns {} when the message is a plain answer.
+    """
+    raw = _json_object(content)
+    if raw is not None:
+        return _match_features(raw, features)
+    text = (content or "").strip()
+    if "=" not in text and ":" not in text:
+        return {}
+    return _match_features({key: value for key, value in _PAIR_RE.findall(text)}, features)
+
+def _json_object(content: str):
+    """The message parsed as a JSON object, or None when it is not one."""
+    text = (content or "").strip()
+    if not text.startswith("{"):
+        return None
+    try:
+        raw = json.loads(text)
+    except ValueError:
+        return None
+    return raw if isinstance(raw, dict) else None
 
 @router.get("/{session_id}/history")
-def get_history(
+async def get_history(
     session_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    cursor: str = None,
+    limit: int = 50,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    session = db.query(ChatSession).filter(ChatSession.id == session_id, ChatSession.user_id == current_user.id).first()
+    """
+    Messages of a session in conversation order, keyset-paginated on (timestamp, id).
+    Pass the returned `next_cursor` back as `cursor` for the next page.
+    """
+    session = await session_store.get(db, session_id, current_user.id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    return session.messages
+    stmt = select(ChatMessage.id, ChatMessage.sender, ChatMessage.content, ChatMessage.timestamp).where(
+        ChatMessage.session_id == session.id
+    )
+    rows, next_cursor = await keyset_page(db, stmt, ChatMessage.timestamp, ChatMessage.id, cursor, clamp_limit(limit))
+    return {"items": [dict(row._mapping) for row in rows], "next_cursor": next_cursor}
+
+@router.get("/{session_id}/similar")
+async def get_similar_patients(
+    session_id: int,
+    k: int = 5,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Describes the dataset rows most similar to the answers collected so far in this session.
+    Everyone gets a non-identifying summary (distances, outcome counts, mean feature deltas);
+    only the admin who uploaded the dataset also gets the raw rows.
+    """
+    session = await session_store.get(db, session_id, current_user.id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    collected = session.state.get("collected_data") or {}
+    k = max(1, min(k, 50))
+    # The vector search is CPU work; keep it off the event loop
+    response = {
+        "session_id": session.id,
+        "summary": await run_in_threadpool(summarize_similar_patients, session.dataset_id, collected, k),
+    }
+    if current_user.role == "admin" and session.dataset_id is not None:
+        owner_id = await db.scalar(select(Dataset.user_id).where(Dataset.id == session.dataset_id))
+        if owner_id == current_user.id:
+            response["similar_patients"] = await run_in_threadpool(find_similar_patients, session.dataset_id, collected, k)
+    return response
 
 def get_next_question(missing_features):
     if not missing_features:
@@ -184,9 +399,17 @@ def get_next_question(missing_features):
 def get_important_features(dataset, disease_type: str, max_features: int = 8):
     """
     Returns a prioritized list of important features for a disease type.
-    Uses predefined feature lists for common diseases, or falls back to correlation-based selection.
+    Uses the data-driven ranking computed at ingest (see dataset_service.rank_features) when present,
+    otherwise predefined feature lists for common diseases, falling back to the first columns.
     """
-    # Predefined important features for common diseases
+    metadata = dataset.metadata_info or {}
+    
+    # Ranking precomputed by process_uploaded_dataset; already excludes the target
+    ranking = metadata.get("feature_ranking")
+    if ranking:
+        return ranking[:max_features]
+    
+    # Predefined important features for common diseases (datasets ingested before ranking existed)
     disease_feature_map = {
         "heart disease": ["age", "blood_pressure", "cholesterol", "chest_pain", "resting_ecg", "max_heart_rate", "exercise_angina", "oldpeak"],
         "heart": ["age", "blood_pressure", "cholesterol", "chest_pain", "resting_ecg", "max_heart_rate", "exercise_angina", "oldpeak"],
@@ -198,8 +421,8 @@ def get_important_features(dataset, disease_type: str, max_features: int = 8):
     }
     
     # Get all columns from dataset metadata
-    all_columns = dataset.metadata_info.get("columns", []) if dataset.metadata_info else []
-    target = dataset.metadata_info.get("suspected_target") if dataset.metadata_info else None
+    all_columns = metadata.get("columns", [])
+    target = metadata.get("suspected_target")
     
     # Remove target from features
     if target and target in all_columns:
@@ -208,14 +431,15 @@ def get_important_features(dataset, disease_type: str, max_features: int = 8):
     # Try to match disease type to predefined features
     disease_lower = disease_type.lower()
     important_features = None
+    available = {c.lower() for c in all_columns}
     
     for key, features in disease_feature_map.items():
         if key in disease_lower:
             # Filter to only include features that exist in the dataset
-            important_features = [f for f in features if f.lower() in [c.lower() for c in all_columns]]
+            important_features = [f for f in features if f.lower() in available]
             break
     
-    # If no match or not enough features, use first N features or correlation-based selection
+    # If no match or not enough features, use first N features
     if not important_features or len(important_features) < 3:
         # Fallback: use first max_features columns (excluding target)
         important_features = all_columns[:max_features]
@@ -224,11 +448,20 @@ def get_important_features(dataset, disease_type: str, max_features: int = 8):
     return important_features[:max_features] if important_features else all_columns[:max_features]
 
 def run_prediction(data, dataset_id, db):
-    # Mock Prediction Logic or call actual TabNet if loaded
-    # In a real world, we'd load the specific model for this dataset.
-    # Here we perform a simple heuristic sum or random for the demo 
-    # unless we connect generic ML logic.
+    """
+    Scores the collected answers with the dataset's compact risk model (trained in the
+    background at upload and kept in memory). Returns (result label, risk score in percent),
+    where the score is None when no model exists and the heuristic fallback was used.
+    """
+    model = get_risk_model(dataset_id)
+    if model is not None:
+        try:
+            risk = model.predict_risk(data) * 100
+            return ("High Risk" if risk >= 50 else "Low Risk"), round(risk, 1)
+        except Exception as e:
+            print(f"Risk model scoring failed for dataset {dataset_id}: {e}")
     
+    # Fallback heuristic while the model is still training (or the dataset has no usable target)
     score = 0
     try:
         # Sum numeric values
@@ -239,5 +472,5 @@ def run_prediction(data, dataset_id, db):
         pass
         
     if score > 50: # Arbitrary threshold
-        return "High Risk"
-    return "Low Risk"
+        return "High Risk", None
+    return "Low Risk", None
@@ -0,0 +1,86 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import ChatSession
+
+# Idle sessions are dropped from memory after this many seconds; 0 disables the cache entirely.
+CHAT_STATE_TTL_SECONDS = float(os.getenv("CHAT_STATE_TTL_SECONDS", "1800"))
+CHAT_STATE_MAX_SESSIONS = int(os.getenv("CHAT_STATE_MAX_SESSIONS", "10000"))
+
+
+class SessionState:
+    """
+    In-memory view of a ChatSession row: everything a chat turn needs without touching the ORM.
+    `state` is treated as immutable; turns build a new dict and hand it back via `ChatStateStore.put`.
+    """
+
+    __slots__ = ("id", "user_id", "dataset_id", "disease_type", "status", "state", "expires_at")
+
+    def __init__(self, id: int, user_id: int, dataset_id: int | None, disease_type: str | None, status: str, state: dict[str, Any]):
+        self.id = id
+        self.user_id = user_id
+        self.dataset_id = dataset_id
+        self.disease_type = disease_type
+        self.status = status
+        self.state = state
+        self.expires_at = 0.0
+
+    @classmethod
+    def from_row(cls, row: ChatSession) -> "SessionState":
+        return cls(row.id, row.user_id, row.dataset_id, row.disease_type, row.status or "active", dict(row.current_state or {}))
+
+
+class ChatStateStore:
+    """
+    Write-back cache of active chat sessions with a TTL, rehydrated from the database on a miss.
+
+    The database stays the source of truth: every turn still persists its messages and new state
+    (in a single transaction), the cache only saves re-reading the session row. It assumes a
+    session's turns are served by one worker process (single worker or sticky sessions); with
+    several workers and no affinity, set CHAT_STATE_TTL_SECONDS=0.
+    """
+
+    def __init__(self, ttl_seconds: float = CHAT_STATE_TTL_SECONDS, max_sessions: int = CHAT_STATE_MAX_SESSIONS):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._sessions: OrderedDict[int, SessionState] = OrderedDict()
+
+    async def get(self, db: AsyncSession, session_id: int, user_id: int) -> SessionState | None:
+        now = time.monotonic()
+        with self._lock:
+            cached = self._sessions.get(session_id)
+            if cached is not None and cached.expires_at > now:
+                self._sessions.move_to_end(session_id)
+                return cached if cached.user_id == user_id else None
+            self._sessions.pop(session_id, None)
+
+        row = await db.scalar(select(ChatSession).where(ChatSession.id == session_id, ChatSession.user_id == user_id))
+        if row is None:
+            return None
+        snapshot = SessionState.from_row(row)
+        self.put(snapshot)
+        return snapshot
+
+    def put(self, snapshot: SessionState) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        snapshot.expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._sessions[snapshot.id] = snapshot
+            self._sessions.move_to_end(snapshot.id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def evict(self, session_id: int) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+
+session_store = ChatStateStore()
@@ -1,9 +1,10 @@
 import os
 import sys
 from sqlalchemy.orm import Session
-from database import SessionLocal, engine, Base
+from database import SessionLocal, engine
 from models import User
-from auth import get_password_hash
+from auth import get_password_hash, invalidate_cached_user
+from migrations import run_migrations
 import getpass
 
 def create_admin():
@@ -28,6 +29,8 @@ def create_admin():
             if update == 'y':
                 existing_user.role = "admin"
                 db.commit()
+                # Running API workers must not keep serving the cached "user" role
+                invalidate_cached_user(email)
                 print(f"User {email} promoted to admin.")
             db.close()
             return
@@ -61,5 +64,5 @@ def create_admin():
 
 if __name__ == "__main__":
     # Ensure tables exist
-    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
     create_admin()
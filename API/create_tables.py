@@ -1,6 +1,6 @@
-from database import engine, Base
-from models import User, Dataset, PatientRecord, Prediction
+from database import engine
+from migrations import run_migrations
 
 print("Creating database tables...")
-Base.metadata.create_all(bind=engine)
+run_migrations(engine)
 print("Tables created successfully!")
@@ -0,0 +1,122 @@
+import re
+import threading
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from models import Dataset
+
+# Shortest keyword prefix indexed, so "heart" finds "heartdisease.csv" but "he" matches nothing.
+MIN_KEYWORD_LENGTH = 3
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize_disease(text: str | None) -> str:
+    return " ".join(_TOKEN_RE.findall((text or "").lower()))
+
+
+def _keywords(text: str | None) -> set[str]:
+    """Every token of the text plus its prefixes of at least MIN_KEYWORD_LENGTH characters."""
+    keys: set[str] = set()
+    for token in _TOKEN_RE.findall((text or "").lower()):
+        for end in range(MIN_KEYWORD_LENGTH, len(token) + 1):
+            keys.add(token[:end])
+    return keys
+
+
+class DiseaseDatasetIndex:
+    """
+    In-memory map from normalized disease names and filename/disease keywords to a processed dataset id.
+
+    Built lazily from the datasets table and updated by `register` when `process_uploaded_dataset`
+    finishes. Other worker processes notice new uploads on their next miss, which re-checks the
+    processed dataset count/max id and rebuilds only when it changed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_disease: dict[str, int] = {}
+        self._by_keyword: dict[str, int] = {}
+        self._fingerprint: tuple[int, int] | None = None
+
+    def _add(self, dataset_id: int, filename: str | None, disease_type: str | None) -> None:
+        # The first (oldest) processed dataset wins, matching the previous `.first()` lookup.
+        disease = normalize_disease(disease_type)
+        if disease:
+            self._by_disease.setdefault(disease, dataset_id)
+        for key in _keywords(filename) | _keywords(disease_type):
+            self._by_keyword.setdefault(key, dataset_id)
+
+    @staticmethod
+    def _fingerprint_query():
+        return select(func.count(Dataset.id), func.max(Dataset.id)).where(Dataset.is_processed == True)
+
+    @staticmethod
+    def _rows_query():
+        return select(Dataset.id, Dataset.filename, Dataset.disease_type).where(Dataset.is_processed == True).order_by(Dataset.id)
+
+    async def _current_fingerprint(self, db: AsyncSession) -> tuple[int, int]:
+        count, max_id = (await db.execute(self._fingerprint_query())).one()
+        return int(count or 0), int(max_id or 0)
+
+    async def rebuild(self, db: AsyncSession) -> None:
+        self._load((await db.execute(self._rows_query())).all())
+
+    def _load(self, rows) -> None:
+        with self._lock:
+            self._by_disease = {}
+            self._by_keyword = {}
+            for dataset_id, filename, disease_type in rows:
+                self._add(dataset_id, filename, disease_type)
+            self._fingerprint = (len(rows), max((r[0] for r in rows), default=0))
+
+    def register(self, dataset: Dataset) -> None:
+        """Adds a freshly processed dataset without rebuilding the whole index."""
+        with self._lock:
+            if self._fingerprint is None:
+                return  # Not built yet; the first lookup will load it from the table.
+            self._add(dataset.id, dataset.filename, dataset.disease_type)
+            count, max_id = self._fingerprint
+            self._fingerprint = (count + 1, max(max_id, dataset.id))
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._fingerprint = None
+
+    def _lookup(self, disease_context: str) -> int | None:
+        disease = normalize_disease(disease_context)
+        search_term = disease.split(" ")[0] if disease else ""
+        with self._lock:
+            return self._by_disease.get(disease) or self._by_keyword.get(search_term)
+
+    async def lookup(self, db: AsyncSession, disease_context: str) -> int | None:
+        """Returns the id of the best processed dataset for a disease context, or None."""
+        if self._fingerprint is None:
+            await self.rebuild(db)
+        found = self._lookup(disease_context)
+        if found is None and await self._current_fingerprint(db) != self._fingerprint:
+            await self.rebuild(db)
+            found = self._lookup(disease_context)
+        return found
+
+    def lookup_sync(self, db: Session, disease_context: str) -> int | None:
+        """`lookup` for sync handlers and helpers running in the threadpool."""
+        if self._fingerprint is None:
+            self._load(db.execute(self._rows_query()).all())
+        found = self._lookup(disease_context)
+        if found is None:
+            count, max_id = db.execute(self._fingerprint_query()).one()
+            if (int(count or 0), int(max_id or 0)) != self._fingerprint:
+                self._load(db.execute(self._rows_query()).all())
+                found = self._lookup(disease_context)
+        return found
+
+    async def has_datasets(self, db: AsyncSession) -> bool:
+        if self._fingerprint is None:
+            await self.rebuild(db)
+        return bool(self._fingerprint and self._fingerprint[0])
+
+
+disease_dataset_index = DiseaseDatasetIndex()
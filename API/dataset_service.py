@@ -1,7 +1,56 @@
 import pandas as pd
+import numpy as np
 import json
+from sklearn.feature_selection import mutual_info_classif, mutual_info_regression
 from sqlalchemy.orm import Session
-from models import Dataset, DatasetChunk, PatientRecord
+from models import Dataset, DatasetChunk
+from dataset_index import disease_dataset_index
+
+# Rows sampled for the ingest-time feature ranking; mutual information is stable well before this.
+MAX_RANKING_ROWS = 20000
+
+
+def rank_features(df: pd.DataFrame, target: str | None) -> list[dict]:
+    """
+    Ranks every non-target column by mutual information with the target, highest first.
+    Returns [{"feature": name, "score": mi}, ...], or [] when there is no usable target.
+    """
+    if not target or target not in df.columns or len(df) < 2:
+        return []
+    if len(df) > MAX_RANKING_ROWS:
+        df = df.sample(n=MAX_RANKING_ROWS, random_state=0)
+
+    features = df.drop(columns=[target])
+    if features.shape[1] == 0:
+        return []
+    columns = {}
+    discrete = []
+    for col in features.columns:
+        series = features[col]
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            columns[col] = series.astype(float).fillna(series.median() if series.notna().any() else 0.0)
+            discrete.append(False)
+        else:
+            columns[col] = pd.Series(pd.factorize(series.astype(str))[0], index=series.index)
+            discrete.append(True)
+    X = pd.DataFrame(columns).to_numpy(dtype=float)
+
+    y_raw = df[target]
+    if y_raw.isna().all():
+        return []
+    if pd.api.types.is_numeric_dtype(y_raw) and y_raw.nunique() > 20:
+        # Continuous outcome (e.g. a risk score) rather than a class label
+        y = y_raw.astype(float).fillna(y_raw.median()).to_numpy()
+        scores = mutual_info_regression(X, y, discrete_features=np.array(discrete), random_state=0)
+    else:
+        y = pd.factorize(y_raw.astype(str))[0]
+        if len(np.unique(y)) < 2:
+            return []
+        scores = mutual_info_classif(X, y, discrete_features=np.array(discrete), random_state=0)
+
+    ranked = sorted(zip(features.columns, scores), key=lambda item: item[1], reverse=True)
+    return [{"feature": str(col), "score": round(float(score), 6)} for col, score in ranked]
+
 
 def process_uploaded_dataset(dataset_id: int, file_path: str, df: pd.DataFrame, db: Session):
     """
@@ -22,13 +71,24 @@ def process_uploaded_dataset(dataset_id: int, file_path: str, df: pd.DataFrame,
     numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
     categorical_cols = df.select_dtypes(exclude=['number']).columns.tolist()
     
+    # Simple heuristic: last column might be the target
+    suspected_target = columns[-1] if columns else None
+    
+    # Rank features once here so chat sessions only read the top-k list
+    try:
+        feature_scores = rank_features(df, suspected_target)
+    except Exception as e:
+        print(f"Feature ranking failed for dataset {dataset_id}: {e}")
+        feature_scores = []
+    
     metadata = {
         "columns": columns,
         "numeric_features": numeric_cols,
         "categorical_features": categorical_cols,
         "row_count": len(df),
-        # Simple heuristic: last column might be the target
-        "suspected_target": columns[-1] if columns else None
+        "suspected_target": suspected_target,
+        "feature_ranking": [item["feature"] for item in feature_scores],
+        "feature_scores": feature_scores,
     }
     
     dataset.metadata_info = metadata
@@ -83,4 +143,7 @@ def process_uploaded_dataset(dataset_id: int, file_path: str, df: pd.DataFrame,
     db.commit()
     db.refresh(dataset)
     
+    # 3. Make the dataset discoverable by chat session start
+    disease_dataset_index.register(dataset)
+    
     return dataset
@@ -1,33 +1,48 @@
-from fastapi import APIRouter, Depends, HTTPException, File, UploadFile
-from sqlalchemy import func
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, File, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import case, delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 import pandas as pd
 import io
 import os
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from database import get_db
-from models import User, Prediction, Dataset, PatientRecord
-from auth import oauth2_scheme, verify_password, get_current_user
+from database import get_async_db, get_db
+from models import Prediction, Dataset, DatasetChunk, ChatSession
+from auth import oauth2_scheme, verify_password, get_current_principal, Principal
 # In a real app, use a proper get_current_user dependency 
 # For now, simplistic token decoding or just passing user_id for partial demo if auth is complex to mock fully in 1 step
 
 # Import ML components
 from ml.tabnet_model import DiseasePredictionTabNet
 from ml.utils import DataPreprocessor
+from ml.risk_model import evict_risk_model, train_dataset_risk_model
+from ml.similarity_index import build_similarity_index, evict_similarity_index, find_similar_patients, summarize_similar_patients
 import pickle
 from dataset_service import process_uploaded_dataset
 from experimental_results_service import (
     experimental_payload_for_admin_diseases,
-    generate_experimental_results,
     load_experimental_results,
 )
+from experimental_results_jobs import get_job as get_regeneration_job, start_regeneration
+from metrics import stage_timer
+from pagination import clamp_limit, keyset_page
+from profiling import profiled
+from record_storage import attach_dataset_storage, create_dataset_storage, drop_dataset_storage, insert_records
+from dataset_index import disease_dataset_index
 
 
-def _admin_dataset_disease_types(db: Session, user_id: int) -> list[str | None]:
-    return [r[0] for r in db.query(Dataset.disease_type).filter(Dataset.user_id == user_id).distinct().all()]
+async def _admin_dataset_disease_types(db: AsyncSession, user_id: int) -> list[str | None]:
+    result = await db.execute(select(Dataset.disease_type).where(Dataset.user_id == user_id).distinct())
+    return list(result.scalars())
+
+
+async def _owned_dataset_count(db: AsyncSession, user_id: int) -> int:
+    return await db.scalar(select(func.count(Dataset.id)).where(Dataset.user_id == user_id)) or 0
 
 router = APIRouter(prefix="/predict", tags=["predict"])
 
@@ -62,36 +77,31 @@ class PredictionInput(BaseModel):
     features: dict
     disease_type: str = "Heart Disease"  # Optional disease type
 
+class SimilarPatientsInput(BaseModel):
+    features: dict
+    k: int = 5
+
 class PredictionResponse(BaseModel):
     risk_score: float
     risk_level: str
     disease: str
     explanation: str
+    # Non-identifying summary of the closest rows in the disease's uploaded dataset, when one exists
+    similar_patients: dict | None = None
 
 # --- Endpoints ---
 
-@router.post("/tabular", response_model=list[PredictionResponse])
-def predict_tabular(input_data: PredictionInput, db: Session = Depends(get_db)):
-    """
-    Receives dynamic patient data, runs it through the Chaos-Optimized TabNet (or mock),
-    and returns risk scores. Supports multiple disease types.
-    """
-    
-    # 1. Prepare Data
-    data_dict = input_data.features
-    disease_type = input_data.disease_type or "Heart Disease"
-    
+def _tabular_risks(data_dict: dict, disease_type: str, X_processed) -> list[dict]:
+    """Risk scores for one patient; X_processed is the preprocessed heart model input (None otherwise)."""
     results = []
-    
-    # 2. Disease-specific prediction logic
     disease_lower = disease_type.lower()
     
     # Heart Disease Prediction
     if "heart" in disease_lower:
         if model and preprocessor:
             try:
-                # Preprocess
-                X_processed = preprocessor.preprocess_inference(data_dict)
+                if X_processed is None:
+                    raise ValueError("preprocessing failed")
                 # Predict
                 probs = model.predict_proba(X_processed)
                 risk_score = float(probs[0][1]) * 100 # Probability of class 1
@@ -175,23 +185,118 @@ def predict_tabular(input_data: PredictionInput, db: Session = Depends(get_db)):
     
     return results
 
+
+@router.post("/tabular", response_model=list[PredictionResponse])
+@profiled("predict_tabular")
+def predict_tabular(input_data: PredictionInput, db: Session = Depends(get_db)):
+    """
+    Receives dynamic patient data, runs it through the Chaos-Optimized TabNet (or mock),
+    and returns risk scores. Supports multiple disease types.
+    """
+    
+    # 1. Prepare Data
+    data_dict = input_data.features
+    disease_type = input_data.disease_type or "Heart Disease"
+
+    # Only heart disease has a trained model to preprocess for; the other scores are heuristics
+    X_processed = None
+    if "heart" in disease_type.lower() and model and preprocessor:
+        with stage_timer("predict_tabular", "preprocess"):
+            try:
+                X_processed = preprocessor.preprocess_inference(data_dict)
+            except Exception as e:
+                print(f"Preprocessing error: {e}")
+
+    # 2. Disease-specific prediction logic
+    with stage_timer("predict_tabular", "inference"):
+        results = _tabular_risks(data_dict, disease_type, X_processed)
+
+    # 3. Similar patients from the uploaded dataset for this disease (summary only: the caller may not read its rows)
+    with stage_timer("predict_tabular", "similar"):
+        dataset_id = disease_dataset_index.lookup_sync(db, disease_type)
+        similar = summarize_similar_patients(dataset_id, data_dict) if dataset_id is not None else None
+    for result in results:
+        result["similar_patients"] = similar
+
+    # Serialized here (not by FastAPI after returning) so the stage timer covers it
+    with stage_timer("predict_tabular", "serialize"):
+        return JSONResponse([PredictionResponse(**r).model_dump() for r in results])
+
 @router.get("/datasets/unique-diseases")
-def get_unique_diseases(db: Session = Depends(get_db)):
+async def get_unique_diseases(db: AsyncSession = Depends(get_async_db)):
     """
     Returns a list of unique disease types available in the datasets.
     """
     # Query distinct disease_types from Dataset table
-    diseases = db.query(Dataset.disease_type).distinct().all()
-    # Flatten result: [('Heart Disease',), ('Diabetes',)] -> ['Heart Disease', 'Diabetes']
-    return [d[0] for d in diseases if d[0]]
+    diseases = await db.scalars(select(Dataset.disease_type).distinct())
+    return [d for d in diseases if d]
+
+@router.post("/datasets/{dataset_id}/similar")
+def similar_patients(
+    dataset_id: int,
+    input_data: SimilarPatientsInput,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db),
+):
+    """
+    Returns the k dataset rows closest to the given feature values (standardized numeric features).
+    Raw rows are returned, so only the admin who uploaded the dataset may query it.
+    """
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can query dataset rows")
+    dataset = db.get(Dataset, dataset_id)
+    if dataset is None or dataset.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    k = max(1, min(input_data.k, 50))
+    return {"dataset_id": dataset_id, "similar_patients": find_similar_patients(dataset_id, input_data.features, k)}
 
 from fastapi import Form
 
+@profiled("upload_dataset")
+def _store_uploaded_dataset(db: Session, content: bytes, filename: str, disease_type: str, user_id: int):
+    """
+    Parses the CSV and writes the dataset, its rows and its metadata with the sync session.
+    Called through run_in_threadpool so the parsing and blocking database work stay off the event loop.
+    """
+    with stage_timer("upload_dataset", "parse"):
+        df = pd.read_csv(io.BytesIO(content))
+        # Use to_dict('records') for faster iteration
+        data_rows = df.to_dict('records')
+        # Clean NaN values to None as Postgres JSON doesn't support NaN
+        records = [{k: (None if pd.isna(v) else v) for k, v in row.items()} for row in data_rows]
+
+    with stage_timer("upload_dataset", "insert"):
+        # Save generic record of upload (scoped to this admin)
+        new_dataset = Dataset(
+            filename=filename,
+            file_path="stored_in_db_as_rows",
+            disease_type=disease_type,
+            user_id=user_id,
+        )
+        db.add(new_dataset)
+        db.commit()
+        db.refresh(new_dataset)
+
+        # Save rows (Store all rows) into the dataset's own table / partition
+        create_dataset_storage(db, new_dataset.id)
+        new_dataset.record_count = insert_records(db, new_dataset.id, records)
+        attach_dataset_storage(db, new_dataset.id)
+        db.commit()
+
+    # Process Metadata and Chunks
+    with stage_timer("upload_dataset", "chunk"):
+        processed = process_uploaded_dataset(new_dataset.id, filename, df, db)
+    if processed is None:
+        return df, len(records), None, {}
+    return df, len(records), processed.id, processed.metadata_info or {}
+
+
 @router.post("/upload_csv")
 async def upload_dataset(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     disease_type: str = Form(...),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
     """
@@ -204,81 +309,76 @@ async def upload_dataset(
         raise HTTPException(status_code=400, detail="Only CSV files are allowed")
 
     content = await file.read()
-    df = pd.read_csv(io.BytesIO(content))
-
-    # Save generic record of upload (scoped to this admin)
-    new_dataset = Dataset(
-        filename=file.filename,
-        file_path="stored_in_db_as_rows",
-        disease_type=disease_type,
-        user_id=current_user.id,
-    ) 
-    db.add(new_dataset)
-    db.commit()
-    db.refresh(new_dataset)
-    
-    # Save rows (Store all rows)
-    records = []
-    # Use to_dict('records') for faster iteration
-    data_rows = df.to_dict('records')
-    
-    for row in data_rows:
-        # Clean NaN values to None as Postgres JSON doesn't support NaN
-        clean_row = {k: (None if pd.isna(v) else v) for k, v in row.items()}
-        
-        record = PatientRecord(
-            dataset_id=new_dataset.id,
-            data=clean_row
+    df, record_count, processed_id, meta = await run_in_threadpool(
+        _store_uploaded_dataset, db, content, file.filename, disease_type, current_user.id
+    )
+
+    # Fit the dataset's chat risk model and similar-patient index after the response is sent
+    if processed_id is not None:
+        background_tasks.add_task(
+            train_dataset_risk_model, processed_id, df, meta.get("suspected_target"), meta.get("feature_ranking")
         )
-        records.append(record)
+        background_tasks.add_task(build_similarity_index, processed_id, df, meta.get("suspected_target"))
     
-    db.add_all(records)
+    return {"message": f"Successfully processed {record_count} records for {disease_type} from {file.filename}."}
+
+
+@router.delete("/datasets/{dataset_id}")
+def delete_dataset(dataset_id: int, current_user: Principal = Depends(get_current_principal), db: Session = Depends(get_db)):
+    """
+    Deletes an uploaded dataset. Its rows go with a detach + DROP of the dataset's table.
+    """
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can delete datasets")
+    dataset = db.get(Dataset, dataset_id)
+    if dataset is None or dataset.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+
+    record_count = dataset.record_count or 0
+    drop_dataset_storage(db, dataset_id)
+    db.execute(delete(DatasetChunk).where(DatasetChunk.dataset_id == dataset_id))
+    db.execute(update(ChatSession).where(ChatSession.dataset_id == dataset_id).values(dataset_id=None))
+    db.execute(delete(Dataset).where(Dataset.id == dataset_id))
     db.commit()
 
-    # Process Metadata and Chunks
-    process_uploaded_dataset(new_dataset.id, file.filename, df, db)
-    
-    return {"message": f"Successfully processed {len(records)} records for {disease_type} from {file.filename}."}
+    disease_dataset_index.invalidate()
+    evict_risk_model(dataset_id)
+    evict_similarity_index(dataset_id)
+    return {"message": f"Deleted dataset {dataset_id} ({record_count} records)."}
 
 
 @router.get("/dashboard/admin-uploads")
-def list_admin_uploads(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def list_admin_uploads(current_user: Principal = Depends(get_current_principal), db: AsyncSession = Depends(get_async_db)):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
-    rows = db.query(Dataset.filename).filter(Dataset.user_id == current_user.id).order_by(Dataset.upload_date.desc()).all()
-    return {"filenames": [r[0] for r in rows if r[0]]}
+    filenames = await db.scalars(
+        select(Dataset.filename).where(Dataset.user_id == current_user.id).order_by(Dataset.upload_date.desc())
+    )
+    return {"filenames": [f for f in filenames if f]}
 
 
 @router.get("/dashboard/admin-stats")
-def get_admin_stats(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_admin_stats(current_user: Principal = Depends(get_current_principal), db: AsyncSession = Depends(get_async_db)):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    total_datasets = db.query(Dataset).filter(Dataset.user_id == current_user.id).count()
-    total_records = (
-        db.query(PatientRecord)
-        .join(Dataset, PatientRecord.dataset_id == Dataset.id)
-        .filter(Dataset.user_id == current_user.id)
-        .count()
-    )
+    total_datasets = await _owned_dataset_count(db, current_user.id)
     has_uploaded_data = total_datasets > 0
 
     disease_rows = (
-        db.query(Dataset.disease_type, func.count(Dataset.id))
-        .filter(Dataset.user_id == current_user.id)
-        .group_by(Dataset.disease_type)
-        .all()
-    )
+        await db.execute(
+            select(Dataset.disease_type, func.count(Dataset.id), func.sum(Dataset.record_count))
+            .where(Dataset.user_id == current_user.id)
+            .group_by(Dataset.disease_type)
+        )
+    ).all()
+    total_records = 0
     diseases_out: list[dict] = []
-    for dtype, dcount in disease_rows:
+    for dtype, dcount, rec_count in disease_rows:
+        # Row counts are kept on the dataset at upload (records live in per-dataset tables)
+        total_records += int(rec_count or 0)
         if dtype is None:
             continue
-        rec_count = (
-            db.query(func.count(PatientRecord.id))
-            .join(Dataset, PatientRecord.dataset_id == Dataset.id)
-            .filter(Dataset.user_id == current_user.id, Dataset.disease_type == dtype)
-            .scalar()
-        )
         diseases_out.append(
             {
                 "disease_type": dtype,
@@ -289,8 +389,8 @@ def get_admin_stats(current_user: User = Depends(get_current_user), db: Session
 
     analytics_models: list[dict] = []
     try:
-        raw = load_experimental_results()
-        filtered = experimental_payload_for_admin_diseases(raw, _admin_dataset_disease_types(db, current_user.id))
+        raw = await run_in_threadpool(load_experimental_results)
+        filtered = experimental_payload_for_admin_diseases(raw, await _admin_dataset_disease_types(db, current_user.id))
         perf = filtered.get("performance") or {}
         key_order = ["alz", "breast", "heart", "diabetes", "lung"]
         for key in key_order:
@@ -317,68 +417,178 @@ def get_admin_stats(current_user: User = Depends(get_current_user), db: Session
         "analytics_models": analytics_models,
     }
 
+# Risk (0-100) from which an assessment / disease counts as a risk factor, matching the chat's "High Risk" cut-off
+HIGH_RISK_THRESHOLD = 50.0
+# Trends compare the mean risk inside this window with the mean before it
+RISK_TREND_WINDOW_DAYS = 30
+
+
+def _round_or_none(value, digits: int = 1):
+    return round(float(value), digits) if value is not None else None
+
+
 @router.get("/dashboard/user-stats")
-def get_user_stats(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    predictions = db.query(Prediction).filter(Prediction.user_id == current_user.id).all()
-    
-    # Calculate average risk (mock logic extraction if needed, assuming risk is in JSON)
-    # Ideally we'd store risk as a column for easier stats, but for JSON:
-    avg_risk = 0
-    if predictions:
-        # This assumes prediction format; strictly for demo stats
-        pass 
-        
+async def get_user_stats(current_user: Principal = Depends(get_current_principal), db: AsyncSession = Depends(get_async_db)):
+    """
+    Per-user assessment statistics, computed by one grouped aggregate over the typed risk columns
+    (covered by ix_predictions_user_disease_stats), so the cost does not grow with history size.
+    """
+    since = datetime.utcnow() - timedelta(days=RISK_TREND_WINDOW_DAYS)
+    is_high = (Prediction.risk_score >= HIGH_RISK_THRESHOLD) | (Prediction.risk_label == "High Risk")
+    rows = (
+        await db.execute(
+            select(
+                Prediction.disease_type,
+                func.count(Prediction.id).label("assessments"),
+                func.count(Prediction.risk_score).label("scored"),
+                func.sum(Prediction.risk_score).label("risk_sum"),
+                func.max(Prediction.risk_score).label("max_risk"),
+                func.sum(case((is_high, 1), else_=0)).label("high_risk"),
+                func.avg(case((Prediction.timestamp >= since, Prediction.risk_score))).label("recent_mean"),
+                func.avg(case((Prediction.timestamp < since, Prediction.risk_score))).label("previous_mean"),
+                func.max(Prediction.timestamp).label("last_assessed_at"),
+            )
+            .where(Prediction.user_id == current_user.id)
+            .group_by(Prediction.disease_type)
+        )
+    ).all()
+
+    diseases = []
+    for r in rows:
+        mean_risk = r.risk_sum / r.scored if r.scored else None
+        trend = r.recent_mean - r.previous_mean if r.recent_mean is not None and r.previous_mean is not None else None
+        diseases.append({
+            "disease_type": r.disease_type,
+            "assessments": r.assessments,
+            "mean_risk": _round_or_none(mean_risk),
+            "max_risk": _round_or_none(r.max_risk),
+            "high_risk_assessments": int(r.high_risk or 0),
+            "recent_mean_risk": _round_or_none(r.recent_mean),
+            "trend": _round_or_none(trend),
+            "last_assessed_at": r.last_assessed_at.isoformat() if r.last_assessed_at else None,
+        })
+
+    scored = sum(r.scored for r in rows)
+    mean_risk = sum(r.risk_sum or 0 for r in rows) / scored if scored else None
+    max_risks = [r.max_risk for r in rows if r.max_risk is not None]
     return {
-        "total_assessments": len(predictions),
-        "health_score": 85, # dynamic placeholder
-        "risk_factors": 3 # dynamic placeholder
+        "total_assessments": sum(r.assessments for r in rows),
+        # 100 minus the mean predicted risk; 85 until the user has a scored assessment
+        "health_score": round(100 - mean_risk) if mean_risk is not None else 85,
+        # Diseases where the user's mean risk is high (or, if unscored, any assessment was labelled high risk)
+        "risk_factors": sum(1 for d in diseases if (d["mean_risk"] or 0) >= HIGH_RISK_THRESHOLD or (d["mean_risk"] is None and d["high_risk_assessments"])),
+        "mean_risk": _round_or_none(mean_risk),
+        "max_risk": _round_or_none(max(max_risks)) if max_risks else None,
+        "high_risk_assessments": sum(d["high_risk_assessments"] for d in diseases),
+        "diseases": diseases,
     }
 
+# Large JSON columns only returned when requested via ?include=input_data,explanations
+_PREDICTION_OPTIONAL_FIELDS = {"input_data": Prediction.input_data, "explanations": Prediction.explanations}
+
+
 @router.get("/predict/history")
-def get_prediction_history(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    predictions = db.query(Prediction).filter(Prediction.user_id == current_user.id).order_by(Prediction.timestamp.desc()).all()
-    return predictions
+async def get_prediction_history(
+    cursor: str | None = None,
+    limit: int = 50,
+    include: str = "",
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Newest-first prediction history, keyset-paginated on (timestamp, id).
+    Pass the returned `next_cursor` back as `cursor` for the next page.
+    """
+    extra = [f.strip() for f in include.split(",") if f.strip() in _PREDICTION_OPTIONAL_FIELDS]
+    columns = [Prediction.id, Prediction.timestamp, Prediction.risk_scores] + [_PREDICTION_OPTIONAL_FIELDS[f] for f in extra]
+    stmt = select(*columns).where(Prediction.user_id == current_user.id)
+    rows, next_cursor = await keyset_page(db, stmt, Prediction.timestamp, Prediction.id, cursor, clamp_limit(limit), descending=True)
+    return {"items": [dict(row._mapping) for row in rows], "next_cursor": next_cursor}
 
 @router.get("/experimental-results")
-def get_experimental_results(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+async def get_experimental_results(
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Returns the evaluation payload used for experimental-results visualizations.
     Admins only see this after they have uploaded at least one dataset (scoped to their account).
     """
     if current_user.role == "admin":
-        owned = db.query(Dataset).filter(Dataset.user_id == current_user.id).count()
+        owned = await _owned_dataset_count(db, current_user.id)
         if owned == 0:
             raise HTTPException(
                 status_code=404,
                 detail="Upload at least one dataset to view experimental analytics.",
             )
     try:
-        data = load_experimental_results()
+        # Cached in memory; only a changed file is re-read and parsed, off the event loop
+        data = await run_in_threadpool(load_experimental_results)
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Experimental results file not found")
     if current_user.role == "admin":
-        data = experimental_payload_for_admin_diseases(data, _admin_dataset_disease_types(db, current_user.id))
+        data = experimental_payload_for_admin_diseases(data, await _admin_dataset_disease_types(db, current_user.id))
     return data
 
 
 @router.post("/experimental-results/regenerate")
-def regenerate_experimental_results(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+async def regenerate_experimental_results(
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
 ):
+    """
+    Starts (or joins) a background regeneration job and returns its status with 202.
+    Progress is available by polling the job or via its server-sent events stream;
+    the current payload keeps being served until the job swaps in the new one.
+    """
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
-    owned = db.query(Dataset).filter(Dataset.user_id == current_user.id).count()
+    owned = await _owned_dataset_count(db, current_user.id)
     if owned == 0:
         raise HTTPException(
             status_code=400,
             detail="Upload at least one dataset before regenerating experimental results.",
         )
-    try:
-        payload = generate_experimental_results()
-        return experimental_payload_for_admin_diseases(payload, _admin_dataset_disease_types(db, current_user.id))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to generate experimental results: {e}")
+    job, created = start_regeneration(requested_by=current_user.id)
+    return JSONResponse(status_code=202, content={"created": created, **job.snapshot()})
+
+
+def _regeneration_job_or_404(job_id: str, current_user: Principal):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    job = get_regeneration_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Regeneration job not found")
+    return job
+
+
+@router.get("/experimental-results/regenerate/{job_id}")
+def get_regeneration_status(job_id: str, since: int = -1, current_user: Principal = Depends(get_current_principal)):
+    """
+    Polling view of a regeneration job: overall status plus the progress events after `since`.
+    """
+    job = _regeneration_job_or_404(job_id, current_user)
+    return {**job.snapshot(), "events": job.events_since(since + 1)}
+
+
+@router.get("/experimental-results/regenerate/{job_id}/events")
+async def stream_regeneration_events(job_id: str, since: int = -1, current_user: Principal = Depends(get_current_principal)):
+    """
+    Server-sent events for a regeneration job; the stream ends once the job has finished.
+    """
+    job = _regeneration_job_or_404(job_id, current_user)
+
+    async def event_stream():
+        seq = since
+        while True:
+            events = await job.wait_for_events(seq, 15.0)
+            if not events:
+                yield ": keep-alive\n\n"
+            for event in events:
+                seq = event["seq"]
+                yield f"id: {seq}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+            if job.done and not job.events_since(seq + 1):
+                yield f"event: end\ndata: {json.dumps(job.snapshot())}\n\n"
+                return
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
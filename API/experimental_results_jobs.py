@@ -0,0 +1,164 @@
+import asyncio
+import contextvars
+import threading
+import time
+import uuid
+from typing import Any
+
+from experimental_results_service import generate_experimental_results
+from profiling import profiled
+
+# Events kept per job for polling / SSE replay; older events are dropped once exceeded.
+MAX_JOB_EVENTS = 500
+# Finished jobs kept around so clients can still read their final status.
+MAX_FINISHED_JOBS = 20
+
+# Profiled when the regenerate request was marked for profiling (see profiling.py)
+_generate_profiled = profiled("regenerate_experimental_results")(generate_experimental_results)
+
+
+class RegenerationJob:
+    """
+    A background run of `generate_experimental_results`.
+    The previous payload keeps being served until the run atomically replaces it on success.
+    """
+
+    def __init__(self, requested_by: int | None = None):
+        self.id = uuid.uuid4().hex
+        self.requested_by = requested_by
+        self.status = "queued"  # queued, running, succeeded, failed
+        self.created_at = time.time()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self.error: str | None = None
+        self.datasets: list[str] = []
+        self.completed: list[str] = []
+        self.trials: dict[str, int] = {}
+        self.trials_per_dataset = 0
+        self.events: list[dict[str, Any]] = []
+        self.event_offset = 0  # sequence number of events[0]
+        self._lock = threading.Lock()
+        # (loop, asyncio.Event) per waiting SSE stream, set from the job thread on every event
+        self._waiters: set[tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    def record(self, event: dict[str, Any], final_status: str | None = None) -> None:
+        """
+        Appends a progress event. With `final_status` the job finishes in the same critical section,
+        so anyone who sees `done` also sees the terminal event.
+        """
+        with self._lock:
+            if final_status is not None:
+                self.status = final_status
+                self.finished_at = time.time()
+            kind = event.get("type")
+            if kind == "started":
+                self.datasets = list(event.get("datasets") or [])
+                self.trials_per_dataset = int(event.get("trials") or 0)
+            elif kind in ("dataset_finished", "dataset_reused"):
+                self.completed.append(event["dataset"])
+            elif kind == "trial":
+                self.trials[event["dataset"]] = int(event["trial"])
+            self.events.append({**event, "seq": self.event_offset + len(self.events), "at": time.time()})
+            if len(self.events) > MAX_JOB_EVENTS:
+                drop = len(self.events) - MAX_JOB_EVENTS
+                del self.events[:drop]
+                self.event_offset += drop
+            for loop, ready in self._waiters:
+                try:
+                    loop.call_soon_threadsafe(ready.set)
+                except RuntimeError:
+                    pass  # the waiting stream's loop is already closed
+
+    def events_since(self, seq: int) -> list[dict[str, Any]]:
+        with self._lock:
+            start = max(0, seq - self.event_offset)
+            return list(self.events[start:])
+
+    async def wait_for_events(self, seq: int, timeout: float) -> list[dict[str, Any]]:
+        """
+        Waits on the event loop (no threadpool thread is held) until events after `seq` (the last
+        one the caller has seen) exist, the job finishes, or `timeout` elapses; returns those events.
+        """
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            ready = self.event_offset + len(self.events) > seq + 1 or self.done
+            if not ready:
+                self._waiters.add(waiter)
+        if not ready:
+            try:
+                await asyncio.wait_for(waiter[1].wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                with self._lock:
+                    self._waiters.discard(waiter)
+        return self.events_since(seq + 1)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "job_id": self.id,
+                "status": self.status,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "error": self.error,
+                "datasets": list(self.datasets),
+                "completed_datasets": list(self.completed),
+                "trials": dict(self.trials),
+                "trials_per_dataset": self.trials_per_dataset,
+                "last_event_seq": self.event_offset + len(self.events) - 1,
+            }
+
+    def run(self) -> None:
+        with self._lock:
+            self.status = "running"
+            self.started_at = time.time()
+        try:
+            payload = _generate_profiled(progress=self.record)
+        except Exception as e:
+            with self._lock:
+                self.error = str(e)
+            self.record({"type": "failed", "error": str(e)}, final_status="failed")
+        else:
+            self.record({"type": "succeeded", "status": payload.get("status")}, final_status="succeeded")
+
+
+_jobs_lock = threading.Lock()
+_jobs: dict[str, RegenerationJob] = {}
+_active_job: RegenerationJob | None = None
+
+
+def start_regeneration(requested_by: int | None = None) -> tuple[RegenerationJob, bool]:
+    """
+    Starts a regeneration job unless one is already running, in which case that job is returned.
+    Returns (job, created).
+    """
+    global _active_job
+    with _jobs_lock:
+        if _active_job is not None and not _active_job.done:
+            return _active_job, False
+        job = RegenerationJob(requested_by=requested_by)
+        _jobs[job.id] = job
+        _active_job = job
+        finished = sorted((j for j in _jobs.values() if j.done), key=lambda j: j.created_at)
+        for old in finished[: max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            _jobs.pop(old.id, None)
+    # Runs in a copy of the caller's context so a profiled regenerate request profiles the job itself
+    context = contextvars.copy_context()
+    threading.Thread(target=context.run, args=(job.run,), name=f"regenerate-{job.id[:8]}", daemon=True).start()
+    return job, True
+
+
+def get_job(job_id: str) -> RegenerationJob | None:
+    with _jobs_lock:
+        return _jobs.get(job_id)
+
+
+def current_job() -> RegenerationJob | None:
+    with _jobs_lock:
+        return _active_job
@@ -1,11 +1,21 @@
+import hashlib
 import json
 import math
+import multiprocessing
 import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
 import numpy as np
 import pandas as pd
+from joblib import Parallel, delayed
 from pandas.api.types import is_numeric_dtype
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.linear_model import LogisticRegression
@@ -22,8 +32,11 @@ from sklearn.metrics import (
 from sklearn.model_selection import train_test_split
 from sklearn.neural_network import MLPClassifier
 from sklearn.preprocessing import LabelEncoder, StandardScaler
+from threadpoolctl import threadpool_limits
 
 from ml.chaos_optimizer import ChaosOptimizer
+from ml.kfold import KFoldEvaluator
+from metrics import stage_timer
 
 try:
     from xgboost import XGBClassifier  # type: ignore
@@ -39,6 +52,33 @@ except Exception:
 BASE_DIR = Path(__file__).resolve().parent
 DEFAULT_RESULTS_PATH = BASE_DIR / "experimental_results.json"
 GENERATED_RESULTS_PATH = BASE_DIR / "experimental_results.generated.json"
+# How long a cached payload is trusted before its file mtime is re-checked.
+RESULTS_CACHE_CHECK_SECONDS = float(os.environ.get("EXPERIMENTAL_RESULTS_CACHE_CHECK_SECONDS", "2"))
+# Worker processes used for per-dataset evaluation; 0 means one per dataset up to the CPU count.
+RESULTS_WORKERS = int(os.environ.get("EXPERIMENTAL_RESULTS_WORKERS", "0"))
+RANDOM_STATE = 42
+TEST_SIZE = 0.2
+CHAOS_ITERATIONS = 6
+# Chaos trials are scored by K-fold CV on the training split (0 or 1: one split against the test set).
+CHAOS_CV_FOLDS = int(os.environ.get("CHAOS_CV_FOLDS", "3"))
+# Fold worker processes per search; 0 means one per fold up to the CPU count. Inside a per-dataset
+# worker (EXPERIMENTAL_RESULTS_WORKERS pool) folds always run serially on that worker's thread budget.
+CHAOS_CV_WORKERS = int(os.environ.get("CHAOS_CV_WORKERS", "0"))
+# Share of each training fold held out for TabNet early stopping, so the fold's score is not tuned on.
+CHAOS_EARLY_STOPPING_SIZE = 0.15
+# Bump whenever the evaluation code changes in a way that invalidates stored sections.
+BENCHMARK_VERSION = 2
+# Parsed, encoded and imputed arrays from _prepare_dataset, keyed by source file hash.
+PREPARED_CACHE_DIR = Path(os.environ.get("PREPARED_DATASET_CACHE_DIR", BASE_DIR / ".cache" / "prepared_datasets"))
+# Bump whenever _prepare_dataset changes so stale conversions are ignored.
+PREPARED_CACHE_VERSION = 1
+
+# Receives progress events such as {"type": "trial", "dataset": "heart", "trial": 3, "trials": 6}.
+ProgressCallback = Callable[[dict[str, Any]], None]
+
+# Process-level cache of the sanitized payload plus filtered views keyed by allowed disease keys.
+_results_lock = threading.Lock()
+_results_cache: dict[str, Any] = {"path": None, "mtime_ns": None, "checked_at": 0.0, "payload": None, "views": {}}
 
 DATASET_KEYWORDS = {
     "alz": ["alz", "alzheimer"],
@@ -145,7 +185,89 @@ def _detect_dataset_key(file_name: str) -> str | None:
     return None
 
 
-def _find_candidate_datasets() -> dict[str, Path]:
+DATASET_SUFFIXES = {".csv", ".xlsx", ".xls"}
+# VCS, cache and virtualenv / package directories, never worth descending into when looking for
+# benchmark files. Generic names ("build", "data", "env") are left alone: they may hold datasets.
+EXCLUDED_DIR_NAMES = {
+    ".git",
+    ".next",
+    ".venv",
+    "venv",
+    "node_modules",
+    "__pycache__",
+    ".pytest_cache",
+    ".mypy_cache",
+    ".cache",
+    "site-packages",
+}
+
+
+class _DatasetDiscoveryIndex:
+    """
+    Caches the candidate files of every scanned directory together with the directory mtime.
+    A directory is re-listed only when its own mtime changes (a file was added, removed or
+    renamed in it) or on an explicit refresh, so repeat discovery costs one stat per directory.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # directory -> (mtime_ns, [file], [subdirectory])
+        self._dirs: dict[Path, tuple[int, list[Path], list[Path]]] = {}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._dirs.clear()
+
+    def _scan(self, directory: Path, seen: set[Path], out: list[Path]) -> None:
+        if directory in seen:
+            return
+        seen.add(directory)
+        try:
+            mtime_ns = directory.stat().st_mtime_ns
+        except OSError:
+            self._dirs.pop(directory, None)
+            return
+        cached = self._dirs.get(directory)
+        if cached is None or cached[0] != mtime_ns:
+            files: list[Path] = []
+            subdirs: list[Path] = []
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in EXCLUDED_DIR_NAMES:
+                                subdirs.append(Path(entry.path))
+                        elif os.path.splitext(entry.name)[1].lower() in DATASET_SUFFIXES and entry.is_file():
+                            files.append(Path(entry.path))
+            except OSError:
+                return
+            cached = (mtime_ns, sorted(files), sorted(subdirs))
+            self._dirs[directory] = cached
+        out.extend(cached[1])
+        for subdir in cached[2]:
+            self._scan(subdir, seen, out)
+
+    def candidates(self, roots: list[Path], refresh: bool = False) -> list[Path]:
+        """Returns every dataset-like file under `roots`, in root order."""
+        with self._lock:
+            if refresh:
+                self._dirs.clear()
+            out: list[Path] = []
+            seen: set[Path] = set()
+            for root in roots:
+                self._scan(root, seen, out)
+            return out
+
+
+_discovery_index = _DatasetDiscoveryIndex()
+
+
+def refresh_dataset_index() -> None:
+    """Forgets all cached directory listings; the next discovery walks the search roots again."""
+    _discovery_index.clear()
+
+
+def _find_candidate_datasets(refresh: bool = False) -> dict[str, Path]:
     candidates: dict[str, Path] = {}
     search_roots = [
         BASE_DIR.parent.parent / "Datasets",
@@ -155,17 +277,10 @@ def _find_candidate_datasets() -> dict[str, Path]:
         BASE_DIR.parent / "datasets",
         BASE_DIR.parent,
     ]
-    for root in search_roots:
-        if not root.exists():
-            continue
-        for path in root.rglob("*"):
-            if not path.is_file():
-                continue
-            if path.suffix.lower() not in {".csv", ".xlsx", ".xls"}:
-                continue
-            key = _detect_dataset_key(path.name)
-            if key and key not in candidates:
-                candidates[key] = path
+    for path in _discovery_index.candidates(search_roots, refresh=refresh):
+        key = _detect_dataset_key(path.name)
+        if key and key not in candidates:
+            candidates[key] = path
     return candidates
 
 
@@ -190,7 +305,7 @@ def _prepare_dataset(path: Path) -> tuple[np.ndarray, np.ndarray, dict[str, Any]
     df = df.fillna(df.mean(numeric_only=True))
     df = df.fillna(0)
 
-    X = df.drop(columns=[target_col]).values
+    X = df.drop(columns=[target_col]).to_numpy(dtype=np.float64)
     y = LabelEncoder().fit_transform(df[target_col].values)
 
     positives = int(np.sum(y == 1)) if len(np.unique(y)) == 2 else int(np.sum(y == y.max()))
@@ -205,15 +320,91 @@ def _prepare_dataset(path: Path) -> tuple[np.ndarray, np.ndarray, dict[str, Any]
     return X, y, meta
 
 
+_hash_lock = threading.Lock()
+_hash_memo: dict[Path, tuple[int, int, str]] = {}
+
+
+def _file_sha256(path: Path) -> str:
+    """SHA-256 of a file, re-hashed only when its mtime or size changes."""
+    st = path.stat()
+    with _hash_lock:
+        memo = _hash_memo.get(path)
+        if memo and memo[:2] == (st.st_mtime_ns, st.st_size):
+            return memo[2]
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    with _hash_lock:
+        _hash_memo[path] = (st.st_mtime_ns, st.st_size, digest.hexdigest())
+    return digest.hexdigest()
+
+
+def load_prepared_dataset(path: Path) -> tuple[np.ndarray, np.ndarray, dict[str, Any]]:
+    """
+    Cached `_prepare_dataset`: the first call parses the file and stores X/y as .npy files
+    (plus meta.json) under PREPARED_CACHE_DIR/<sha256>; later calls memory-map them read-only.
+    """
+    path = Path(path)
+    entry = PREPARED_CACHE_DIR / f"{_file_sha256(path)}-v{PREPARED_CACHE_VERSION}"
+    try:
+        with open(entry / "meta.json", "r", encoding="utf-8") as handle:
+            meta = json.load(handle)
+        X = np.load(entry / "X.npy", mmap_mode="r")
+        y = np.load(entry / "y.npy", mmap_mode="r")
+        return X, y, meta
+    except (OSError, ValueError):
+        pass
+
+    X, y, meta = _prepare_dataset(path)
+    try:
+        PREPARED_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix=".prepared.", dir=PREPARED_CACHE_DIR))
+        np.save(staging / "X.npy", X)
+        np.save(staging / "y.npy", y)
+        with open(staging / "meta.json", "w", encoding="utf-8") as handle:
+            json.dump(meta, handle)
+        try:
+            # The rename publishes the entry atomically; a concurrent writer may have won already.
+            os.replace(staging, entry)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+    except OSError as e:
+        print(f"Could not cache prepared dataset {path}: {e}")
+    return X, y, meta
+
+
+def _dataset_seed(key: str) -> int:
+    """Stable per-dataset seed so parallel runs are reproducible regardless of scheduling order."""
+    return RANDOM_STATE + zlib.crc32(key.encode("utf-8")) % 10_000
+
+
+def _seed_everything(seed: int) -> None:
+    np.random.seed(seed)
+    try:
+        import torch
+
+        torch.manual_seed(seed)
+    except Exception:
+        pass
+
+
+def _chaos_x0(seed: int) -> float:
+    # Stay clear of the logistic map's fixed points (0, 0.25, 0.5, 0.75, 1.0).
+    x0 = float(np.random.default_rng(seed).uniform(0.01, 0.99))
+    return x0 + 1e-3 if x0 in (0.25, 0.5, 0.75) else x0
+
+
 def _fit_tabnet(
     X_train: np.ndarray,
     y_train: np.ndarray,
     X_test: np.ndarray,
     y_test: np.ndarray,
     params: dict[str, Any] | None = None,
+    seed: int = RANDOM_STATE,
 ) -> tuple[np.ndarray, np.ndarray]:
     if TabNetClassifier is None:
-        model = MLPClassifier(hidden_layer_sizes=(64, 32), max_iter=400, random_state=42)
+        model = MLPClassifier(hidden_layer_sizes=(64, 32), max_iter=400, random_state=seed)
         model.fit(X_train, y_train)
         preds = model.predict(X_test)
         probs = model.predict_proba(X_test)
@@ -228,35 +419,66 @@ def _fit_tabnet(
         "optimizer_params": {"lr": 2e-2},
         "momentum": 0.02,
     }
-    model = TabNetClassifier(**actual_params, verbose=0)
+    model = TabNetClassifier(**actual_params, seed=seed, verbose=0)
     model.fit(X_train, y_train, eval_set=[(X_test, y_test)], patience=20, max_epochs=60)
     preds = model.predict(X_test)
     probs = model.predict_proba(X_test)
     return preds, probs
 
 
+def _score_tabnet_fold(
+    params: dict[str, Any],
+    X_train: np.ndarray,
+    y_train: np.ndarray,
+    X_valid: np.ndarray,
+    y_valid: np.ndarray,
+    seed: int,
+) -> float:
+    """Accuracy of one chaos trial on one CV fold; runs in a KFoldEvaluator worker."""
+    X_fit, X_stop, y_fit, y_stop = train_test_split(
+        X_train,
+        y_train,
+        test_size=CHAOS_EARLY_STOPPING_SIZE,
+        random_state=seed,
+        stratify=y_train if len(np.unique(y_train)) > 1 else None,
+    )
+    model = TabNetClassifier(**params, seed=seed, verbose=0)
+    model.fit(X_fit, y_fit, eval_set=[(X_stop, y_stop)], patience=10, max_epochs=40)
+    return float(accuracy_score(y_valid, model.predict(X_valid)))
+
+
 def _fit_chaos_tabnet(
     X_train: np.ndarray,
     y_train: np.ndarray,
     X_test: np.ndarray,
     y_test: np.ndarray,
+    seed: int = RANDOM_STATE,
+    on_trial: Callable[[int, dict[str, Any], float | None], None] | None = None,
 ) -> tuple[np.ndarray, np.ndarray]:
     if TabNetClassifier is None:
-        model = MLPClassifier(hidden_layer_sizes=(96, 48), learning_rate_init=0.005, max_iter=500, random_state=42)
+        model = MLPClassifier(hidden_layer_sizes=(96, 48), learning_rate_init=0.005, max_iter=500, random_state=seed)
         model.fit(X_train, y_train)
         preds = model.predict(X_test)
         probs = model.predict_proba(X_test)
         return preds, probs
 
-    optimizer = ChaosOptimizer(n_iterations=6)
+    optimizer = ChaosOptimizer(n_iterations=CHAOS_ITERATIONS)
 
-    def evaluate(params: dict[str, Any]) -> float:
-        model = TabNetClassifier(**params, verbose=0)
-        model.fit(X_train, y_train, eval_set=[(X_test, y_test)], patience=10, max_epochs=40)
-        preds = model.predict(X_test)
-        return float(accuracy_score(y_test, preds))
+    if CHAOS_CV_FOLDS > 1:
+        fold_workers = 1 if _in_dataset_worker else CHAOS_CV_WORKERS
+        with KFoldEvaluator(
+            _score_tabnet_fold, X_train, y_train, n_splits=CHAOS_CV_FOLDS, workers=fold_workers, seed=seed
+        ) as evaluate:
+            best_params, _best_score = optimizer.optimize(evaluate, x0=_chaos_x0(seed), callback=on_trial)
+    else:
+
+        def evaluate(params: dict[str, Any]) -> float:
+            model = TabNetClassifier(**params, seed=seed, verbose=0)
+            model.fit(X_train, y_train, eval_set=[(X_test, y_test)], patience=10, max_epochs=40)
+            preds = model.predict(X_test)
+            return float(accuracy_score(y_test, preds))
 
-    best_params, _best_score = optimizer.optimize(evaluate)
+        best_params, _best_score = optimizer.optimize(evaluate, x0=_chaos_x0(seed), callback=on_trial)
     if best_params is None:
         best_params = {
             "n_d": 32,
@@ -268,13 +490,24 @@ def _fit_chaos_tabnet(
             "momentum": 0.02,
         }
 
-    model = TabNetClassifier(**best_params, verbose=0)
+    model = TabNetClassifier(**best_params, seed=seed, verbose=0)
     model.fit(X_train, y_train, eval_set=[(X_test, y_test)], patience=20, max_epochs=80)
     preds = model.predict(X_test)
     probs = model.predict_proba(X_test)
     return preds, probs
 
 
+def _baseline_accuracy(
+    estimator: Any,
+    X_train: np.ndarray,
+    y_train: np.ndarray,
+    X_test: np.ndarray,
+    y_test: np.ndarray,
+) -> float:
+    estimator.fit(X_train, y_train)
+    return round(accuracy_score(y_test, estimator.predict(X_test)) * 100, 1)
+
+
 def _heart_model_comparison(
     X_train: np.ndarray,
     y_train: np.ndarray,
@@ -283,25 +516,29 @@ def _heart_model_comparison(
     baseline_acc: float,
     chaos_acc: float,
 ) -> list[dict[str, Any]]:
-    comparisons: list[dict[str, Any]] = []
-
-    logistic = LogisticRegression(max_iter=1000, random_state=42)
-    logistic.fit(X_train, y_train)
-    comparisons.append({"name": "Logistic Regression", "accuracy": round(accuracy_score(y_test, logistic.predict(X_test)) * 100, 1)})
-
-    forest = RandomForestClassifier(n_estimators=200, random_state=42)
-    forest.fit(X_train, y_train)
-    comparisons.append({"name": "Random Forest", "accuracy": round(accuracy_score(y_test, forest.predict(X_test)) * 100, 1)})
-
+    baselines: list[tuple[str, Any]] = [
+        ("Logistic Regression", LogisticRegression(max_iter=1000, random_state=RANDOM_STATE)),
+        ("Random Forest", RandomForestClassifier(n_estimators=200, random_state=RANDOM_STATE)),
+    ]
     if XGBClassifier is not None:
-        xgb = XGBClassifier(use_label_encoder=False, eval_metric="logloss", random_state=42)
-        xgb.fit(X_train, y_train)
-        comparisons.append({"name": "XGBoost", "accuracy": round(accuracy_score(y_test, xgb.predict(X_test)) * 100, 1)})
-
-    mlp = MLPClassifier(hidden_layer_sizes=(128, 64), max_iter=450, random_state=42)
-    mlp.fit(X_train, y_train)
-    comparisons.append({"name": "Tabular Neural Net", "accuracy": round(accuracy_score(y_test, mlp.predict(X_test)) * 100, 1)})
+        baselines.append(
+            ("XGBoost", XGBClassifier(use_label_encoder=False, eval_metric="logloss", random_state=RANDOM_STATE))
+        )
+    baselines.append(("Tabular Neural Net", MLPClassifier(hidden_layer_sizes=(128, 64), max_iter=450, random_state=RANDOM_STATE)))
+
+    # Baselines are independent fits, so run them side by side within this process's CPU budget
+    # (XGBoost would otherwise take every core per fit); joblib keeps the output order.
+    n_jobs = min(len(baselines), _cpu_budget())
+    for _name, estimator in baselines:
+        if XGBClassifier is not None and isinstance(estimator, XGBClassifier):
+            estimator.set_params(n_jobs=max(1, _cpu_budget() // n_jobs))
+    accuracies = Parallel(n_jobs=n_jobs)(
+        delayed(_baseline_accuracy)(estimator, X_train, y_train, X_test, y_test) for _name, estimator in baselines
+    )
 
+    comparisons: list[dict[str, Any]] = [
+        {"name": name, "accuracy": accuracy} for (name, _estimator), accuracy in zip(baselines, accuracies)
+    ]
     comparisons.append({"name": "Standard TabNet", "accuracy": baseline_acc})
     comparisons.append({"name": "Chaos-Opt TabNet", "accuracy": chaos_acc})
     return comparisons
@@ -373,14 +610,9 @@ def filter_experimental_payload(payload: dict[str, Any], allowed_keys: set[str])
     return out
 
 
-def experimental_payload_for_admin_diseases(
-    payload: dict[str, Any],
-    disease_types: list[str | None],
-) -> dict[str, Any]:
-    clean = [d for d in disease_types if d]
-    allowed = disease_types_to_allowed_keys(clean)
+def _filtered_view(payload: dict[str, Any], allowed: frozenset[str]) -> dict[str, Any]:
     if allowed:
-        return filter_experimental_payload(payload, allowed)
+        return filter_experimental_payload(payload, set(allowed))
     out = filter_experimental_payload(payload, set())
     hint = (
         " Add words like heart, diabetes, lung, breast, or alzheimer to your disease name to match report benchmarks."
@@ -389,75 +621,319 @@ def experimental_payload_for_admin_diseases(
     return out
 
 
-def load_experimental_results() -> dict[str, Any]:
+def experimental_payload_for_admin_diseases(
+    payload: dict[str, Any],
+    disease_types: list[str | None],
+) -> dict[str, Any]:
+    clean = [d for d in disease_types if d]
+    allowed = frozenset(disease_types_to_allowed_keys(clean))
+    with _results_lock:
+        cached = _results_cache["payload"] is payload
+        if cached and allowed in _results_cache["views"]:
+            return _results_cache["views"][allowed]
+    view = _filtered_view(payload, allowed)
+    if cached:
+        with _results_lock:
+            # The payload may have been swapped while filtering; only memoize against the live one.
+            if _results_cache["payload"] is payload:
+                _results_cache["views"][allowed] = view
+    return view
+
+
+def _results_file_signature() -> tuple[Path, int] | None:
     for path in [GENERATED_RESULTS_PATH, DEFAULT_RESULTS_PATH]:
-        if path.exists():
-            with open(path, "r", encoding="utf-8") as handle:
-                return _sanitize_for_json(json.load(handle))
-    raise FileNotFoundError("No experimental results payload found")
+        try:
+            return path, path.stat().st_mtime_ns
+        except FileNotFoundError:
+            continue
+    return None
 
 
-def generate_experimental_results() -> dict[str, Any]:
-    datasets = _find_candidate_datasets()
-    if not datasets:
-        payload = load_experimental_results()
-        payload["source"] = "fallback"
-        payload["status"] = "No dataset files found. Using fallback report metrics."
-        return payload
+def invalidate_experimental_results_cache() -> None:
+    """Drop the cached payload and its filtered views so the next read goes back to disk."""
+    with _results_lock:
+        _results_cache.update(path=None, mtime_ns=None, checked_at=0.0, payload=None, views={})
 
-    dataset_overview: list[dict[str, Any]] = []
-    performance: dict[str, Any] = {}
-    error_metrics: list[dict[str, Any]] = []
-    confusion_matrices: list[dict[str, Any]] = []
-    model_comparison: list[dict[str, Any]] = []
 
-    for key, path in datasets.items():
-        X, y, meta = _prepare_dataset(path)
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42, stratify=y if len(np.unique(y)) > 1 else None
-        )
+def load_experimental_results() -> dict[str, Any]:
+    """
+    Returns the sanitized results payload, re-reading the file only when its mtime changes.
+    The returned dict is shared across requests, so callers must copy it before mutating.
+    """
+    now = time.monotonic()
+    with _results_lock:
+        payload = _results_cache["payload"]
+        if payload is not None and now - _results_cache["checked_at"] < RESULTS_CACHE_CHECK_SECONDS:
+            return payload
+
+    signature = _results_file_signature()
+    if signature is None:
+        invalidate_experimental_results_cache()
+        raise FileNotFoundError("No experimental results payload found")
+    path, mtime_ns = signature
+
+    with _results_lock:
+        if _results_cache["payload"] is not None and (_results_cache["path"], _results_cache["mtime_ns"]) == (path, mtime_ns):
+            _results_cache["checked_at"] = now
+            return _results_cache["payload"]
+
+    with open(path, "r", encoding="utf-8") as handle:
+        payload = _sanitize_for_json(json.load(handle))
+    # Per-dataset sections only feed incremental regeneration; clients get the assembled lists.
+    payload.pop("sections", None)
+    with _results_lock:
+        _results_cache.update(path=path, mtime_ns=mtime_ns, checked_at=now, payload=payload, views={})
+    return payload
 
-        scaler = StandardScaler()
-        X_train = scaler.fit_transform(X_train)
-        X_test = scaler.transform(X_test)
 
-        baseline_pred, baseline_prob = _fit_tabnet(X_train, y_train, X_test, y_test)
-        chaos_pred, chaos_prob = _fit_chaos_tabnet(X_train, y_train, X_test, y_test)
+class _CallbackEvents:
+    """Queue-like adapter so inline evaluation reports progress the same way pool workers do."""
 
-        dataset_overview.append({"name": DATASET_LABELS[key], **meta})
-        performance[key] = {
-            "label": DATASET_LABELS[key],
-            "baseline": _metric_payload(y_test, baseline_pred, baseline_prob),
-            "chaos": _metric_payload(y_test, chaos_pred, chaos_prob),
-        }
-        error_metrics.append(_error_payload(DATASET_LABELS[key], y_test, baseline_pred, chaos_pred))
-        confusion_matrices.append({
-            "name": DATASET_LABELS[key],
+    def __init__(self, callback: ProgressCallback):
+        self.callback = callback
+
+    def put(self, event: dict[str, Any]) -> None:
+        self.callback(event)
+
+
+def _emit(events: Any, **event: Any) -> None:
+    if events is not None:
+        events.put(event)
+
+
+def _evaluate_dataset(key: str, path: Path, seed: int, events: Any = None) -> dict[str, Any]:
+    """Runs the full benchmark for one dataset and returns its payload section."""
+    _emit(events, type="dataset_started", dataset=key)
+    _seed_everything(seed)
+    X, y, meta = load_prepared_dataset(path)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=TEST_SIZE, random_state=RANDOM_STATE, stratify=y if len(np.unique(y)) > 1 else None
+    )
+
+    scaler = StandardScaler()
+    X_train = scaler.fit_transform(X_train)
+    X_test = scaler.transform(X_test)
+
+    _emit(events, type="stage", dataset=key, stage="baseline")
+    baseline_pred, baseline_prob = _fit_tabnet(X_train, y_train, X_test, y_test, seed=seed)
+
+    def on_trial(trial: int, _params: dict[str, Any], score: float | None) -> None:
+        _emit(events, type="trial", dataset=key, trial=trial, trials=CHAOS_ITERATIONS, score=score)
+
+    _emit(events, type="stage", dataset=key, stage="chaos_search")
+    chaos_pred, chaos_prob = _fit_chaos_tabnet(X_train, y_train, X_test, y_test, seed=seed, on_trial=on_trial)
+
+    label = DATASET_LABELS[key]
+    performance = {
+        "label": label,
+        "baseline": _metric_payload(y_test, baseline_pred, baseline_prob),
+        "chaos": _metric_payload(y_test, chaos_pred, chaos_prob),
+    }
+    section: dict[str, Any] = {
+        "overview": {"name": label, **meta},
+        "performance": performance,
+        "error_metrics": _error_payload(label, y_test, baseline_pred, chaos_pred),
+        "confusion_matrix": {
+            "name": label,
             "baseline": confusion_matrix(y_test, baseline_pred, labels=[0, 1]).tolist(),
             "chaos": confusion_matrix(y_test, chaos_pred, labels=[0, 1]).tolist(),
+        },
+        "model_comparison": None,
+    }
+    if key == "heart":
+        _emit(events, type="stage", dataset=key, stage="model_comparison")
+        section["model_comparison"] = _heart_model_comparison(
+            X_train,
+            y_train,
+            X_test,
+            y_test,
+            performance["baseline"]["accuracy"],
+            performance["chaos"]["accuracy"],
+        )
+    _emit(events, type="dataset_finished", dataset=key)
+    return _sanitize_for_json(section)
+
+
+# Set in per-dataset worker processes, whose chaos searches must not start pools of their own.
+_in_dataset_worker = False
+# CPU threads this process may use; 0 means the whole machine (set to its share in dataset workers).
+_thread_budget = 0
+
+
+def _cpu_budget() -> int:
+    return _thread_budget or os.cpu_count() or 1
+
+
+def _init_worker(threads: int) -> None:
+    # Split the cores between workers so joblib, BLAS and torch in each process do not oversubscribe
+    # the machine. BLAS is already loaded by the imports here, so OMP_NUM_THREADS alone is too late.
+    global _in_dataset_worker, _thread_budget
+    _in_dataset_worker = True
+    _thread_budget = threads
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    threadpool_limits(limits=threads)
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+    except Exception:
+        pass
+
+
+def _evaluate_datasets(
+    datasets: dict[str, Path],
+    progress: ProgressCallback | None = None,
+) -> dict[str, dict[str, Any]]:
+    if not datasets:
+        return {}
+    cpu_count = os.cpu_count() or 1
+    workers = RESULTS_WORKERS or min(len(datasets), cpu_count)
+    if workers <= 1 or len(datasets) <= 1:
+        events = _CallbackEvents(progress) if progress else None
+        return {key: _evaluate_dataset(key, path, _dataset_seed(key), events) for key, path in datasets.items()}
+
+    # "spawn" keeps torch and the web server's threads out of the forked children.
+    context = multiprocessing.get_context("spawn")
+    manager = context.Manager() if progress else None
+    events = manager.Queue() if manager else None
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(max(1, cpu_count // workers),),
+        ) as pool:
+            futures = {
+                key: pool.submit(_evaluate_dataset, key, path, _dataset_seed(key), events)
+                for key, path in datasets.items()
+            }
+            pending = set(futures.values())
+            while pending:
+                _done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                _drain_events(events, progress)
+            _drain_events(events, progress)
+            return {key: future.result() for key, future in futures.items()}
+    finally:
+        if manager is not None:
+            manager.shutdown()
+
+
+def _drain_events(events: Any, progress: ProgressCallback | None) -> None:
+    if events is None or progress is None:
+        return
+    while True:
+        try:
+            progress(events.get_nowait())
+        except queue.Empty:
+            return
+
+
+def _write_results_atomically(payload: dict[str, Any]) -> None:
+    """Readers keep seeing the previous file until the new one is complete and renamed into place."""
+    fd, tmp_path = tempfile.mkstemp(prefix=".experimental_results.", suffix=".json", dir=GENERATED_RESULTS_PATH.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(payload, handle, indent=2, allow_nan=False)
+        os.replace(tmp_path, GENERATED_RESULTS_PATH)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _config_hash(key: str) -> str:
+    """Hash of everything besides the file content that shapes a dataset's section."""
+    config = {
+        "version": BENCHMARK_VERSION,
+        "key": key,
+        "seed": _dataset_seed(key),
+        "random_state": RANDOM_STATE,
+        "test_size": TEST_SIZE,
+        "chaos_iterations": CHAOS_ITERATIONS,
+        "chaos_cv_folds": CHAOS_CV_FOLDS,
+        "tabnet": TabNetClassifier is not None,
+        "xgboost": XGBClassifier is not None,
+    }
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _load_previous_sections() -> dict[str, Any]:
+    if not GENERATED_RESULTS_PATH.exists():
+        return {}
+    try:
+        with open(GENERATED_RESULTS_PATH, "r", encoding="utf-8") as handle:
+            return json.load(handle).get("sections") or {}
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+
+def generate_experimental_results(progress: ProgressCallback | None = None) -> dict[str, Any]:
+    """
+    Benchmarks every discovered dataset and writes the generated payload.
+    `progress`, when given, receives per-dataset and per-trial events as they happen.
+    """
+    with stage_timer("generate_experimental_results", "discover"):
+        datasets = _find_candidate_datasets()
+    if not datasets:
+        payload = dict(load_experimental_results())
+        payload["source"] = "fallback"
+        payload["status"] = "No dataset files found. Using fallback report metrics."
+        return payload
+
+    # Only datasets whose file content or evaluation config changed are recomputed.
+    with stage_timer("generate_experimental_results", "hash"):
+        previous = _load_previous_sections()
+        hashes = {key: (_file_sha256(path), _config_hash(key)) for key, path in datasets.items()}
+    reused: dict[str, dict[str, Any]] = {}
+    for key, (content_hash, config_hash) in hashes.items():
+        prev = previous.get(key) or {}
+        if prev.get("content_hash") == content_hash and prev.get("config_hash") == config_hash and prev.get("result"):
+            reused[key] = prev["result"]
+    if progress:
+        progress({
+            "type": "started",
+            "datasets": list(datasets),
+            "recompute": [key for key in datasets if key not in reused],
+            "trials": CHAOS_ITERATIONS,
         })
+        for key in reused:
+            progress({"type": "dataset_reused", "dataset": key})
+    with stage_timer("generate_experimental_results", "evaluate"):
+        computed = _evaluate_datasets({key: path for key, path in datasets.items() if key not in reused}, progress)
+    results = {key: reused[key] if key in reused else computed[key] for key in datasets}
 
-        if key == "heart":
-            model_comparison = _heart_model_comparison(
-                X_train,
-                y_train,
-                X_test,
-                y_test,
-                performance[key]["baseline"]["accuracy"],
-                performance[key]["chaos"]["accuracy"],
-            )
+    model_comparison: list[dict[str, Any]] = []
+    for section in results.values():
+        if section["model_comparison"] is not None:
+            model_comparison = section["model_comparison"]
 
     payload = _sanitize_for_json({
         "source": "generated",
-        "status": f"Generated from {len(datasets)} dataset file(s).",
-        "dataset_overview": dataset_overview,
-        "performance": performance,
-        "error_metrics": error_metrics,
+        "status": (
+            f"Generated from {len(datasets)} dataset file(s) "
+            f"({len(computed)} recomputed, {len(reused)} reused)."
+        ),
+        "dataset_overview": [section["overview"] for section in results.values()],
+        "performance": {key: section["performance"] for key, section in results.items()},
+        "error_metrics": [section["error_metrics"] for section in results.values()],
         "model_comparison": model_comparison,
-        "confusion_matrices": confusion_matrices,
+        "confusion_matrices": [section["confusion_matrix"] for section in results.values()],
     })
+    stored = {
+        **payload,
+        "sections": {
+            key: {
+                "source_path": str(datasets[key]),
+                "content_hash": hashes[key][0],
+                "config_hash": hashes[key][1],
+                "result": results[key],
+            }
+            for key in datasets
+        },
+    }
 
-    with open(GENERATED_RESULTS_PATH, "w", encoding="utf-8") as handle:
-        json.dump(payload, handle, indent=2, allow_nan=False)
+    with stage_timer("generate_experimental_results", "write"):
+        _write_results_atomically(stored)
+    invalidate_experimental_results_cache()
 
     return payload
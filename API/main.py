@@ -5,18 +5,25 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.auth import router as auth_router
 from app.chat import router as chat_router
-from app.database import Base, engine
+from app.database import engine
 from app.endpoints import router as predict_router
 from app.summary import build_project_summary
+from metrics import install_metrics
+from migrations import run_migrations
+from profiling import install_profiling
 
 # API CONTRACT
 # GET  /api/health
 #   response: {"ok": true}
 # GET  /api/project-summary
 #   response: {"repositoryType": str, "summary": str, "artifacts": list[str], "runNotes": list[str]}
+# GET  /metrics  (Authorization: Bearer <METRICS_TOKEN or admin access token>)
+#   response: Prometheus text format (per-route latency/size histograms, in-flight gauges, stage timers)
 # POST /predict/tabular
 #   request: {"features": dict, "disease_type": str}
-#   response: list[{"disease": str, "risk_score": float, "risk_level": str, "explanation": str}]
+#   response: list[{"disease": str, "risk_score": float, "risk_level": str, "explanation": str,
+#                   "similar_patients": {"neighbours": int, "distances": list[float], "outcomes": dict,
+#                                        "mean_feature_deltas": dict} | null}]
 # GET  /predict/datasets/unique-diseases
 #   response: list[str]
 # POST /predict/upload_csv
@@ -26,11 +33,15 @@ from app.summary import build_project_summary
 #   response: {"filenames": list[str]}
 # GET  /predict/dashboard/admin-stats
 #   response: object with aggregated admin stats
+# GET  /predict/predict/history?cursor=<str>&limit=<int>&include=<comma-separated optional fields>
+#   response: {"items": list[{"id": int, "timestamp": str, "risk_scores": object, ...}], "next_cursor": str | null}
+# GET  /chat/{session_id}/history?cursor=<str>&limit=<int>
+#   response: {"items": list[{"id": int, "sender": str, "content": str, "timestamp": str}], "next_cursor": str | null}
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
     yield
 
 
@@ -45,6 +56,8 @@ app.add_middleware(
 app.include_router(auth_router)
 app.include_router(predict_router)
 app.include_router(chat_router)
+install_metrics(app)
+install_profiling(app)
 
 
 @app.get("/api/health")
@@ -0,0 +1,192 @@
+"""
+In-process request and stage metrics, exported in the Prometheus text format on /metrics.
+
+MetricsMiddleware records per-route latency and response size histograms plus in-flight gauges;
+stage_timer() records named stages inside a handler or job. Routes are labelled by their path
+template ("/chat/{session_id}/message"), never the raw path, so label cardinality stays bounded.
+
+/metrics reveals traffic and error rates per route, so it needs `Authorization: Bearer <token>`
+with either METRICS_TOKEN (for the Prometheus scraper) or an admin access token.
+"""
+import bisect
+import hmac
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from fastapi import Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+
+from auth import principal_from_claims
+
+# Static bearer token for scrapers; unset means only admin access tokens can read /metrics.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Seconds; covers sub-millisecond handlers up to multi-minute regenerations.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class Histogram:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Histograms and gauges keyed by label tuples; all updates go through one lock."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: dict[str, tuple[str, tuple, tuple[str, ...], dict]] = {}
+        self._gauges: dict[str, tuple[str, tuple[str, ...], dict]] = {}
+
+    def histogram(self, name: str, help_text: str, labels: tuple[str, ...], buckets: tuple = LATENCY_BUCKETS) -> None:
+        self._histograms[name] = (help_text, buckets, labels, {})
+
+    def gauge(self, name: str, help_text: str, labels: tuple[str, ...]) -> None:
+        self._gauges[name] = (help_text, labels, {})
+
+    def observe(self, name: str, value: float, *label_values: str) -> None:
+        _help, buckets, _labels, series = self._histograms[name]
+        with self._lock:
+            hist = series.get(label_values)
+            if hist is None:
+                hist = series[label_values] = Histogram(buckets)
+            hist.observe(value)
+
+    def add(self, name: str, amount: float, *label_values: str) -> None:
+        _help, _labels, series = self._gauges[name]
+        with self._lock:
+            series[label_values] = series.get(label_values, 0) + amount
+
+    def reset(self) -> None:
+        with self._lock:
+            for _help, _buckets, _labels, series in self._histograms.values():
+                series.clear()
+            for _help, _labels, series in self._gauges.values():
+                series.clear()
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name, (help_text, buckets, labels, series) in self._histograms.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for label_values, hist in sorted(series.items()):
+                    base = _labels(labels, label_values)
+                    cumulative = 0
+                    for bound, count in zip(buckets + ("+Inf",), hist.counts):
+                        cumulative += count
+                        le = bound if bound == "+Inf" else _number(bound)
+                        lines.append(f"{name}_bucket{_labels(labels + ('le',), label_values + (le,))} {cumulative}")
+                    lines.append(f"{name}_sum{base} {_number(hist.total)}")
+                    lines.append(f"{name}_count{base} {hist.count}")
+            for name, (help_text, labels, series) in self._gauges.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} gauge")
+                for label_values, value in sorted(series.items()):
+                    lines.append(f"{name}{_labels(labels, label_values)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+registry = MetricsRegistry()
+registry.histogram("http_request_duration_seconds", "Request latency by route template.", ("method", "route", "status"))
+registry.histogram("http_response_size_bytes", "Response body size by route template.", ("method", "route"), SIZE_BUCKETS)
+registry.gauge("http_requests_in_flight", "Requests currently being handled.", ("method",))
+registry.histogram("stage_duration_seconds", "Duration of named stages inside handlers and jobs.", ("operation", "stage"))
+
+
+@contextmanager
+def stage_timer(operation: str, stage: str):
+    """Times the block as stage `stage` of `operation`; safe in threads and worker pools."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.observe("stage_duration_seconds", time.perf_counter() - started, operation, stage)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (no body buffering, streaming responses pass straight through).
+
+    The route label comes from scope["route"], which the router fills in when it dispatches, so
+    in-flight requests (not yet routed) are only counted per method.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        registry.add("http_requests_in_flight", 1, method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            registry.add("http_requests_in_flight", -1, method)
+            route = getattr(scope.get("route"), "path", None) or UNMATCHED_ROUTE
+            registry.observe("http_request_duration_seconds", time.perf_counter() - started, method, route, str(status))
+            registry.observe("http_response_size_bytes", size, method, route)
+
+
+def _authorize_scrape(authorization: str) -> None:
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+    if METRICS_TOKEN and hmac.compare_digest(token.encode(), METRICS_TOKEN.encode()):
+        return
+    principal = principal_from_claims(token)
+    if principal is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
+    if principal.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+
+def install_metrics(app) -> None:
+    """Adds MetricsMiddleware and the /metrics endpoint (METRICS_TOKEN or admin only) to a FastAPI app."""
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics(authorization: str = Header(default="")) -> PlainTextResponse:
+        _authorize_scrape(authorization)
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,26 @@
+import argparse
+
+from database import engine
+from migrations import applied_versions, discover_migrations, run_migrations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations to DATABASE_URL.")
+    parser.add_argument("--list", action="store_true", help="Show migrations and whether they are applied")
+    parser.add_argument("--target", type=int, help="Stop after this version")
+    args = parser.parse_args()
+
+    if args.list:
+        with engine.connect() as conn:
+            applied = applied_versions(conn)
+        for migration in discover_migrations():
+            mark = "x" if migration.VERSION in applied else " "
+            print(f"[{mark}] {migration.VERSION:04d} {migration.DESCRIPTION}")
+        return
+
+    applied_now = run_migrations(engine, target=args.target)
+    print(f"Applied {len(applied_now)} migration(s)." if applied_now else "Database is up to date.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Versioned schema migrations.
+
+Each module `vNNNN_<name>.py` in this package defines `VERSION` (int), `DESCRIPTION` and
+`upgrade(conn)`. Applied versions are recorded in `schema_migrations`; `run_migrations` applies the
+missing ones in order, each in its own transaction. Run offline with `python migrate.py`.
+"""
+import importlib
+import pkgutil
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+MIGRATIONS_TABLE = "schema_migrations"
+# Serializes concurrent runners (several API workers starting at once) on PostgreSQL.
+_PG_LOCK_ID = 7243_0043
+
+
+def discover_migrations() -> list:
+    modules = []
+    for info in pkgutil.iter_modules(__path__):
+        if info.name.startswith("v") and info.name[1:5].isdigit():
+            modules.append(importlib.import_module(f"{__name__}.{info.name}"))
+    modules.sort(key=lambda m: m.VERSION)
+    versions = [m.VERSION for m in modules]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f"Duplicate migration versions: {versions}")
+    return modules
+
+
+def _ensure_migrations_table(conn: Connection) -> None:
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} ("
+        "version INTEGER PRIMARY KEY, description VARCHAR(255), applied_at TIMESTAMP)"
+    ))
+
+
+def applied_versions(conn: Connection) -> set[int]:
+    if not inspect(conn).has_table(MIGRATIONS_TABLE):
+        return set()
+    return {row[0] for row in conn.execute(text(f"SELECT version FROM {MIGRATIONS_TABLE}"))}
+
+
+def run_migrations(bind: Engine | None = None, target: int | None = None, verbose: bool = True) -> list[int]:
+    """Applies pending migrations up to `target` (default: all) and returns the versions applied."""
+    if bind is None:
+        from database import engine as bind
+
+    applied_now = []
+    for migration in discover_migrations():
+        if target is not None and migration.VERSION > target:
+            break
+        with bind.begin() as conn:
+            if conn.dialect.name == "postgresql":
+                conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": _PG_LOCK_ID})
+            _ensure_migrations_table(conn)
+            if migration.VERSION in applied_versions(conn):
+                continue
+            if verbose:
+                print(f"Applying migration {migration.VERSION:04d}: {migration.DESCRIPTION}")
+            migration.upgrade(conn)
+            conn.execute(
+                text(f"INSERT INTO {MIGRATIONS_TABLE} (version, description, applied_at) VALUES (:v, :d, :t)"),
+                {"v": migration.VERSION, "d": migration.DESCRIPTION, "t": datetime.utcnow()},
+            )
+        applied_now.append(migration.VERSION)
+    return applied_now
+
+
+# --- Helpers for idempotent migrations (databases created by create_all may already have the change) ---
+
+def has_column(conn: Connection, table: str, column: str) -> bool:
+    return any(c["name"] == column for c in inspect(conn).get_columns(table))
+
+
+def add_column_if_missing(conn: Connection, table: str, column: str, ddl: str) -> None:
+    """`ddl` is the column type and options, e.g. "BOOLEAN DEFAULT FALSE"."""
+    if not has_column(conn, table, column):
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
+def create_index_if_missing(conn: Connection, name: str, table: str, columns: list[str]) -> None:
+    conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"))
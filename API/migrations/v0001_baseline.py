@@ -0,0 +1,17 @@
+"""Creates the tables of the ORM models and the columns update_schema.py used to add by hand."""
+from sqlalchemy.engine import Connection
+
+from migrations import add_column_if_missing
+
+VERSION = 1
+DESCRIPTION = "Baseline schema"
+
+
+def upgrade(conn: Connection) -> None:
+    from database import Base
+    import models  # noqa: F401  (registers the tables on Base.metadata)
+
+    Base.metadata.create_all(bind=conn)
+    # Databases created before these columns existed
+    add_column_if_missing(conn, "datasets", "metadata_info", "JSON DEFAULT '{}'")
+    add_column_if_missing(conn, "datasets", "is_processed", "BOOLEAN DEFAULT FALSE")
@@ -0,0 +1,18 @@
+"""Indexes for the hot foreign keys behind the dashboard, chat and history queries."""
+from sqlalchemy.engine import Connection
+
+from migrations import create_index_if_missing
+
+VERSION = 2
+DESCRIPTION = "Performance indexes for records, chat messages, predictions and datasets"
+
+
+def upgrade(conn: Connection) -> None:
+    # Record counts / scans per dataset
+    create_index_if_missing(conn, "ix_patient_records_dataset_id", "patient_records", ["dataset_id"])
+    # Chat history: WHERE session_id = ? ORDER BY timestamp, id
+    create_index_if_missing(conn, "ix_chat_messages_session_timestamp_id", "chat_messages", ["session_id", "timestamp", "id"])
+    # Prediction history / user stats: WHERE user_id = ? ORDER BY timestamp DESC, id DESC
+    create_index_if_missing(conn, "ix_predictions_user_timestamp_id", "predictions", ["user_id", "timestamp", "id"])
+    # Admin dashboard: WHERE user_id = ? ORDER BY upload_date DESC
+    create_index_if_missing(conn, "ix_datasets_user_upload_date", "datasets", ["user_id", "upload_date"])
@@ -0,0 +1,48 @@
+"""Typed risk columns on predictions (backfilled from the risk_scores JSON) for SQL-side user stats."""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from migrations import add_column_if_missing, create_index_if_missing
+
+VERSION = 3
+DESCRIPTION = "Typed risk_score / risk_label / disease_type columns on predictions"
+
+BACKFILL_BATCH_ROWS = 1000
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def upgrade(conn: Connection) -> None:
+    add_column_if_missing(conn, "predictions", "risk_score", "FLOAT")
+    add_column_if_missing(conn, "predictions", "risk_label", "VARCHAR")
+    add_column_if_missing(conn, "predictions", "disease_type", "VARCHAR")
+
+    # Backfill by keyset over id so large tables are processed in bounded batches
+    from models import Prediction
+
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            text(
+                "SELECT id, risk_scores FROM predictions "
+                "WHERE id > :last AND risk_label IS NULL ORDER BY id LIMIT :n"
+            ).columns(Prediction.__table__.c.id, Prediction.__table__.c.risk_scores),
+            {"last": last_id, "n": BACKFILL_BATCH_ROWS},
+        ).all()
+        if not rows:
+            break
+        updates = []
+        for row in rows:
+            scores = row.risk_scores if isinstance(row.risk_scores, dict) else {}
+            updates.append({"id": row.id, "score": _to_float(scores.get("risk_score")), "label": scores.get("result")})
+        conn.execute(text("UPDATE predictions SET risk_score = :score, risk_label = :label WHERE id = :id"), updates)
+        last_id = rows[-1].id
+
+    create_index_if_missing(
+        conn, "ix_predictions_user_disease_stats", "predictions", ["user_id", "disease_type", "timestamp", "risk_score", "risk_label"]
+    )
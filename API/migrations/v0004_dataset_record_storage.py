@@ -0,0 +1,73 @@
+"""
+Moves patient_records rows into per-dataset tables (record_storage): LIST partitions of
+patient_records on PostgreSQL, standalone tables on SQLite. Adds datasets.record_count so
+dashboards no longer count rows.
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from migrations import add_column_if_missing
+from record_storage import attach_dataset_storage, count_records, create_dataset_storage, table_name
+
+VERSION = 4
+DESCRIPTION = "Per-dataset patient_records storage and datasets.record_count"
+
+
+def _dataset_ids(conn: Connection, table: str) -> list[int]:
+    return [r[0] for r in conn.execute(text(f"SELECT DISTINCT dataset_id FROM {table} WHERE dataset_id IS NOT NULL")).all()]
+
+
+def _partition_postgres(conn: Connection) -> None:
+    kind = conn.execute(text("SELECT relkind FROM pg_class WHERE oid = to_regclass('patient_records')")).scalar()
+    if kind == "p":
+        return  # already partitioned
+
+    conn.execute(text("ALTER TABLE patient_records RENAME TO patient_records_legacy"))
+    # Keep the id sequence when the legacy table (its owner) is dropped
+    conn.execute(text("ALTER SEQUENCE IF EXISTS patient_records_id_seq OWNED BY NONE"))
+    conn.execute(text(
+        "CREATE TABLE patient_records ("
+        "id INTEGER NOT NULL DEFAULT nextval('patient_records_id_seq'), "
+        "dataset_id INTEGER REFERENCES datasets(id), "
+        "data JSON"
+        ") PARTITION BY LIST (dataset_id)"
+    ))
+    # Rows without a dataset; the CHECK lets ATTACH PARTITION skip scanning it.
+    conn.execute(text("CREATE TABLE patient_records_default PARTITION OF patient_records DEFAULT"))
+    conn.execute(text("ALTER TABLE patient_records_default ADD CONSTRAINT patient_records_default_no_dataset CHECK (dataset_id IS NULL)"))
+
+    for dataset_id in _dataset_ids(conn, "patient_records_legacy"):
+        create_dataset_storage(conn, dataset_id)
+        conn.execute(
+            text(f"INSERT INTO {table_name(dataset_id)} (id, dataset_id, data) SELECT id, dataset_id, data FROM patient_records_legacy WHERE dataset_id = :id"),
+            {"id": dataset_id},
+        )
+        attach_dataset_storage(conn, dataset_id)
+    conn.execute(text("INSERT INTO patient_records_default (id, dataset_id, data) SELECT id, dataset_id, data FROM patient_records_legacy WHERE dataset_id IS NULL"))
+
+    conn.execute(text("DROP TABLE patient_records_legacy"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_patient_records_dataset_id ON patient_records (dataset_id)"))
+
+
+def _split_sqlite(conn: Connection) -> None:
+    for dataset_id in _dataset_ids(conn, "patient_records"):
+        create_dataset_storage(conn, dataset_id)
+        conn.execute(
+            text(f"INSERT INTO {table_name(dataset_id)} (dataset_id, data) SELECT dataset_id, data FROM patient_records WHERE dataset_id = :id ORDER BY id"),
+            {"id": dataset_id},
+        )
+        conn.execute(text("DELETE FROM patient_records WHERE dataset_id = :id"), {"id": dataset_id})
+
+
+def upgrade(conn: Connection) -> None:
+    add_column_if_missing(conn, "datasets", "record_count", "INTEGER DEFAULT 0")
+    if conn.dialect.name == "postgresql":
+        _partition_postgres(conn)
+    else:
+        _split_sqlite(conn)
+
+    for dataset_id in [r[0] for r in conn.execute(text("SELECT id FROM datasets")).all()]:
+        conn.execute(
+            text("UPDATE datasets SET record_count = :n WHERE id = :id"),
+            {"n": count_records(conn, dataset_id), "id": dataset_id},
+        )
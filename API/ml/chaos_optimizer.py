@@ -12,6 +12,7 @@ class ChaosOptimizer:
     def __init__(self, n_iterations=30, r=4.0):
         self.n_iterations = n_iterations
         self.r = r # Control parameter, 4.0 ensures chaotic behavior
+        self.history = [] # One entry per trial of the last optimize() run
         
     def generate_chaotic_sequence(self, x0, length):
         """
@@ -56,17 +57,22 @@ class ChaosOptimizer:
             "momentum": 0.02
         }
 
-    def optimize(self, eval_function, x0=None):
+    def optimize(self, eval_function, x0=None, callback=None):
         """
         Runs the chaos optimization loop.
         
         Args:
-            eval_function: A function that takes params and returns a score (higher is better).
+            eval_function: A function that takes params and returns a score (higher is better), or a
+                dict with "mean" and "variance" (e.g. ml.kfold.KFoldEvaluator); trials are ranked by the mean.
             x0: Initial chaotic value. If None, random (0,1) is used.
+            callback: Optional function called as callback(iteration, params, score) after each
+                trial; score is None when the trial failed.
             
         Returns:
             best_params: The hyperparameters that achieved the highest score.
             best_score: The highest score achieved.
+
+        Every trial is also recorded in self.history as {"iteration", "params", "score", "variance"}.
         """
         if x0 is None:
             x0 = np.random.random()
@@ -76,6 +82,7 @@ class ChaosOptimizer:
                 
         best_score = -float('inf')
         best_params = None
+        self.history = []
         
         print(f"Starting Chaos Optimization with x0={x0:.4f} for {self.n_iterations} iterations...")
         
@@ -89,9 +96,15 @@ class ChaosOptimizer:
             
             # 3. Evaluate (Train model with these params)
             print(f"Iteration {i+1}/{self.n_iterations}: Testing params {params}...")
+            score = None
+            variance = None
             try:
-                score = eval_function(params)
-                print(f"  -> Score: {score:.4f}")
+                result = eval_function(params)
+                if isinstance(result, dict):
+                    score, variance = float(result["mean"]), result.get("variance")
+                else:
+                    score = result
+                print(f"  -> Score: {score:.4f}" + (f" (variance {variance:.6f})" if variance is not None else ""))
                 
                 # 4. Update best
                 if score > best_score:
@@ -99,6 +112,11 @@ class ChaosOptimizer:
                     best_params = params
                     print(f"  -> New Best found!")
             except Exception as e:
+                score = None
+                variance = None
                 print(f"  -> Failed to evaluate params: {e}")
+            self.history.append({"iteration": i + 1, "params": params, "score": score, "variance": variance})
+            if callback is not None:
+                callback(i + 1, params, score)
                 
         return best_params, best_score
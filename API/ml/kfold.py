@@ -0,0 +1,157 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Callable
+
+import numpy as np
+from sklearn.model_selection import KFold, StratifiedKFold
+
+# fold_fn(params, X_train, y_train, X_valid, y_valid, seed) -> score (higher is better).
+# Must be a module-level function so spawned workers can unpickle it.
+FoldFunction = Callable[[dict[str, Any], np.ndarray, np.ndarray, np.ndarray, np.ndarray, int], float]
+
+# Arrays attached in each worker process, keyed by shared memory block name.
+_worker_arrays: dict[str, np.ndarray] = {}
+_worker_blocks: list[shared_memory.SharedMemory] = []
+
+
+def _share(array: np.ndarray) -> tuple[shared_memory.SharedMemory, tuple[str, tuple[int, ...], str]]:
+    array = np.ascontiguousarray(array)
+    block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    return block, (block.name, array.shape, array.dtype.str)
+
+
+def _attach_worker(specs: list[tuple[str, tuple[int, ...], str]], threads: int) -> None:
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+    except Exception:
+        pass
+    for name, shape, dtype in specs:
+        # Spawned workers share the parent's resource tracker, so the parent's unlink() is the only cleanup.
+        block = shared_memory.SharedMemory(name=name)
+        _worker_blocks.append(block)
+        array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        array.flags.writeable = False
+        _worker_arrays[name] = array
+
+
+def _run_fold(
+    fold_fn: FoldFunction,
+    x_name: str,
+    y_name: str,
+    train_idx: np.ndarray,
+    valid_idx: np.ndarray,
+    params: dict[str, Any],
+    seed: int,
+) -> float:
+    X, y = _worker_arrays[x_name], _worker_arrays[y_name]
+    # Fancy indexing copies only this fold's rows; the full matrix stays in shared memory.
+    return float(fold_fn(params, X[train_idx], y[train_idx], X[valid_idx], y[valid_idx], seed))
+
+
+class KFoldEvaluator:
+    """
+    Scores a hyperparameter set as the mean over K folds instead of one train/validation split.
+
+    X and y are copied once into shared memory blocks that every worker process maps at startup,
+    so each trial only ships the params and fold indices. The worker pool lives as long as the
+    evaluator (use it as a context manager around a whole search), and folds of one trial run in
+    parallel. With workers=1 the folds run one after another in the calling process instead (no
+    pool, no shared memory), e.g. when the caller already is one of several worker processes.
+    Calling the evaluator returns {"mean", "variance", "std", "fold_scores"}, which
+    ChaosOptimizer.optimize accepts directly.
+    """
+
+    def __init__(
+        self,
+        fold_fn: FoldFunction,
+        X: np.ndarray,
+        y: np.ndarray,
+        n_splits: int = 5,
+        workers: int = 0,
+        seed: int = 42,
+        stratify: bool = True,
+    ):
+        if n_splits < 2:
+            raise ValueError("KFoldEvaluator needs n_splits >= 2")
+        self.fold_fn = fold_fn
+        self.n_splits = n_splits
+        self.seed = seed
+        splitter = (
+            StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed)
+            if stratify and len(np.unique(y)) > 1
+            else KFold(n_splits=n_splits, shuffle=True, random_state=seed)
+        )
+        self.folds = [(train.astype(np.int64), valid.astype(np.int64)) for train, valid in splitter.split(X, y)]
+
+        cpu_count = os.cpu_count() or 1
+        self.workers = workers or min(n_splits, cpu_count)
+        self._blocks: list[shared_memory.SharedMemory] = []
+        self._pool = None
+        self._arrays: tuple[np.ndarray, np.ndarray] | None = None
+        if self.workers <= 1:
+            self._arrays = (X, y)
+            return
+        try:
+            x_block, x_spec = _share(X)
+            self._blocks.append(x_block)
+            y_block, y_spec = _share(y)
+            self._blocks.append(y_block)
+            self._names = (x_spec[0], y_spec[0])
+            # "spawn" keeps torch and any server threads out of the children, as in experimental_results_service.
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_attach_worker,
+                initargs=([x_spec, y_spec], max(1, cpu_count // self.workers)),
+            )
+        except BaseException:
+            self.close()
+            raise
+
+    def __call__(self, params: dict[str, Any]) -> dict[str, Any]:
+        if self._arrays is not None:
+            X, y = self._arrays
+            scores = np.array(
+                [
+                    float(self.fold_fn(params, X[train], y[train], X[valid], y[valid], self.seed + i))
+                    for i, (train, valid) in enumerate(self.folds)
+                ],
+                dtype=float,
+            )
+        elif self._pool is not None:
+            x_name, y_name = self._names
+            futures = [
+                self._pool.submit(_run_fold, self.fold_fn, x_name, y_name, train, valid, params, self.seed + i)
+                for i, (train, valid) in enumerate(self.folds)
+            ]
+            scores = np.array([future.result() for future in futures], dtype=float)
+        else:
+            raise RuntimeError("KFoldEvaluator is closed")
+        return {
+            "mean": float(scores.mean()),
+            "variance": float(scores.var(ddof=1)),
+            "std": float(scores.std(ddof=1)),
+            "fold_scores": scores.tolist(),
+        }
+
+    def close(self) -> None:
+        self._arrays = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self) -> "KFoldEvaluator":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,176 @@
+import os
+import pickle
+import threading
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RISK_MODEL_DIR = os.environ.get("RISK_MODEL_DIR", os.path.join(BASE_DIR, "models", "datasets"))
+# Matches the number of questions a chat session asks (chat.get_important_features).
+RISK_MODEL_MAX_FEATURES = 8
+# Targets with more distinct values than this are treated as continuous and get no risk model.
+RISK_MODEL_MAX_CLASSES = 10
+# String labels recognised as the "not at risk" class.
+BASELINE_LABELS = {"0", "false", "no", "none", "negative", "absent", "absence", "normal", "healthy"}
+
+
+class DatasetRiskModel:
+    """
+    Compact logistic-regression risk model for one uploaded dataset.
+
+    Fitting goes through scikit-learn, but scoring is a hand-rolled dot product over the stored
+    coefficients so a single chat answer set scores in microseconds without sklearn overhead.
+    Missing or unparseable answers are imputed with the training median / most common category.
+    """
+
+    def __init__(self, features, categories, fill_values, mean, scale, coef, intercept, baseline_label):
+        self.features = features
+        self.categories = categories  # feature -> {value: code} for non-numeric features
+        self.fill_values = fill_values  # feature -> value used when an answer is missing
+        self.mean = mean
+        self.scale = scale
+        self.coef = coef
+        self.intercept = intercept
+        self.baseline_label = baseline_label  # every other class counts as at risk
+        self._lower = {f.lower(): f for f in features}
+
+    @classmethod
+    def fit(cls, df: pd.DataFrame, target: str, features: list[str]):
+        features = [f for f in features if f in df.columns and f != target]
+        data = df.dropna(subset=[target])
+        if not features or not 2 <= data[target].nunique() <= RISK_MODEL_MAX_CLASSES:
+            return None
+        y, baseline = cls._at_risk(data[target])
+        if y is None:
+            return None
+
+        categories, fill_values, columns = {}, {}, []
+        for f in features:
+            series = data[f]
+            if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+                fill = float(series.median()) if series.notna().any() else 0.0
+                columns.append(series.astype(float).fillna(fill).to_numpy())
+            else:
+                values = series.astype(str)
+                mapping = {v: float(i) for i, v in enumerate(sorted(values.unique()))}
+                categories[f] = mapping
+                fill = mapping[values.mode().iloc[0]]
+                columns.append(values.map(mapping).to_numpy(dtype=float))
+            fill_values[f] = fill
+        X = np.column_stack(columns)
+
+        mean = X.mean(axis=0)
+        scale = X.std(axis=0)
+        scale[scale == 0] = 1.0
+        clf = LogisticRegression(max_iter=1000)
+        clf.fit((X - mean) / scale, y)
+        return cls(features, categories, fill_values, mean, scale, clf.coef_[0].copy(), float(clf.intercept_[0]), baseline)
+
+    @staticmethod
+    def _at_risk(target: pd.Series):
+        """
+        Binary "at risk" label: every class except the baseline one, so multi-class severity
+        targets (heart `num` 0-4) count all non-zero grades. Numeric targets use their smallest
+        value as the baseline; string targets a recognised negative label, else the most common.
+        Returns (None, None) for continuous numeric targets.
+        """
+        if pd.api.types.is_bool_dtype(target):
+            target = target.astype(int)
+        numeric = pd.to_numeric(target, errors="coerce")
+        if numeric.notna().all():
+            if not np.allclose(numeric, numeric.round()):
+                return None, None
+            baseline = numeric.min()
+            return (numeric != baseline).astype(int).to_numpy(), str(baseline)
+        labels = target.astype(str)
+        negatives = sorted(l for l in labels.unique() if l.strip().lower() in BASELINE_LABELS)
+        baseline = negatives[0] if negatives else labels.mode().iloc[0]
+        return (labels != baseline).astype(int).to_numpy(), baseline
+
+    def _value(self, feature: str, answer) -> float:
+        if answer is None:
+            return self.fill_values[feature]
+        mapping = self.categories.get(feature)
+        if mapping is not None:
+            return mapping.get(str(answer), self.fill_values[feature])
+        try:
+            return float(answer)
+        except (TypeError, ValueError):
+            return self.fill_values[feature]
+
+    def predict_risk(self, answers: dict) -> float:
+        """Probability (0-1) of the positive class for one set of answers."""
+        by_feature = {}
+        for key, value in answers.items():
+            feature = self._lower.get(str(key).lower())
+            if feature is not None:
+                by_feature[feature] = value
+        x = np.fromiter((self._value(f, by_feature.get(f)) for f in self.features), dtype=float, count=len(self.features))
+        logit = float(((x - self.mean) / self.scale) @ self.coef) + self.intercept
+        return 1.0 / (1.0 + np.exp(-logit))
+
+
+def _model_path(dataset_id: int) -> str:
+    return os.path.join(RISK_MODEL_DIR, f"{dataset_id}_risk.pkl")
+
+
+_cache_lock = threading.Lock()
+_models: dict[int, DatasetRiskModel] = {}
+
+
+def train_dataset_risk_model(dataset_id: int, df: pd.DataFrame, target: str | None, ranking: list[str] | None):
+    """
+    Fits and saves the risk model for a dataset on its top-ranked features.
+    Meant to run off the request path (FastAPI background task or a script).
+    """
+    if not target or target not in df.columns:
+        return None
+    features = list(ranking or [c for c in df.columns if c != target])[:RISK_MODEL_MAX_FEATURES]
+    try:
+        model = DatasetRiskModel.fit(df, target, features)
+    except Exception as e:
+        print(f"Risk model training failed for dataset {dataset_id}: {e}")
+        return None
+    if model is None:
+        return None
+
+    os.makedirs(RISK_MODEL_DIR, exist_ok=True)
+    path = _model_path(dataset_id)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(model, f)
+    os.replace(tmp_path, path)
+    with _cache_lock:
+        _models[dataset_id] = model
+    return model
+
+
+def get_risk_model(dataset_id: int | None):
+    """Returns the cached risk model for a dataset, loading it from disk once; None if not trained."""
+    if dataset_id is None:
+        return None
+    with _cache_lock:
+        model = _models.get(dataset_id)
+    if model is not None:
+        return model
+    path = _model_path(dataset_id)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            model = pickle.load(f)
+    except Exception as e:
+        print(f"Could not load risk model for dataset {dataset_id}: {e}")
+        return None
+    with _cache_lock:
+        _models[dataset_id] = model
+    return model
+
+
+def evict_risk_model(dataset_id: int) -> None:
+    with _cache_lock:
+        _models.pop(dataset_id, None)
+    if os.path.exists(_model_path(dataset_id)):
+        os.remove(_model_path(dataset_id))
@@ -0,0 +1,234 @@
+import json
+import os
+import shutil
+import threading
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+try:
+    import faiss  # type: ignore
+except Exception:
+    faiss = None
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SIMILARITY_INDEX_DIR = os.environ.get("SIMILARITY_INDEX_DIR", os.path.join(BASE_DIR, "models", "datasets"))
+# Rows standardized per batch in add_rows, so a large upload never holds a float64 copy of every row.
+BUILD_BATCH_ROWS = 50000
+# Fewest neighbours a summary is computed over, so it never describes a single dataset row.
+SUMMARY_MIN_NEIGHBOURS = 5
+
+
+class PatientSimilarityIndex:
+    """
+    Nearest-neighbour index over standardized numeric feature vectors of one dataset.
+
+    Uses an exact FAISS IndexFlatL2 when faiss is installed, otherwise an exact NumPy search with
+    precomputed row norms (one matrix-vector product per query). Standardization parameters are
+    fixed when the index is created, so `add_rows` only appends vectors.
+    """
+
+    def __init__(self, features: list[str], mean: np.ndarray, scale: np.ndarray, target: str | None = None):
+        self.features = features
+        self.target = target
+        self.mean = mean.astype(np.float32)
+        self.scale = scale.astype(np.float32)
+        self.vectors = np.empty((0, len(features)), dtype=np.float32)
+        self.norms = np.empty(0, dtype=np.float32)
+        self.targets: list = []
+        self._faiss = faiss.IndexFlatL2(len(features)) if faiss is not None else None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, df: pd.DataFrame, target: str | None = None):
+        features = [c for c in df.select_dtypes(include=["number"]).columns if c != target]
+        if not features or df.empty:
+            return None
+        values = df[features].astype(float)
+        mean = values.mean().fillna(0.0).to_numpy()
+        scale = values.std().fillna(1.0).to_numpy(copy=True)
+        scale[scale == 0] = 1.0
+        return cls(features, mean, scale, target)
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def _standardize(self, values: np.ndarray) -> np.ndarray:
+        z = (values.astype(np.float32) - self.mean) / self.scale
+        # Missing values sit at the feature mean, i.e. contribute no distance.
+        return np.nan_to_num(z, nan=0.0, posinf=0.0, neginf=0.0).astype(np.float32)
+
+    def add_rows(self, df: pd.DataFrame) -> int:
+        """Appends rows, standardized in batches and stacked once; returns the new index size."""
+        blocks = []
+        for start in range(0, len(df), BUILD_BATCH_ROWS):
+            part = df.iloc[start:start + BUILD_BATCH_ROWS]
+            block = part.reindex(columns=self.features).apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float32)
+            blocks.append(self._standardize(block))
+        if not blocks:
+            return len(self)
+        vectors = np.ascontiguousarray(np.concatenate(blocks))
+        targets = df[self.target].tolist() if self.target and self.target in df.columns else [None] * len(df)
+        with self._lock:
+            self.vectors = np.concatenate([self.vectors, vectors]) if len(self.vectors) else vectors
+            self.norms = np.concatenate([self.norms, np.einsum("ij,ij->i", vectors, vectors)])
+            self.targets.extend(targets)
+            if self._faiss is not None:
+                self._faiss.add(vectors)
+            return len(self.vectors)
+
+    def query(self, answers: dict, k: int = 5) -> list[dict]:
+        """Returns the k nearest rows to the given feature values, closest first."""
+        lower = {str(key).lower(): value for key, value in answers.items()}
+        raw = np.array([_to_float(lower.get(f.lower())) for f in self.features], dtype=np.float32)
+        q = self._standardize(raw[None, :])
+        with self._lock:
+            n = len(self.vectors)
+            k = max(0, min(k, n))
+            if k == 0:
+                return []
+            if self._faiss is not None:
+                distances, indices = self._faiss.search(q, k)
+                order, dist = indices[0], distances[0]
+            else:
+                # ||x - q||^2 = ||x||^2 - 2 x.q + ||q||^2; argpartition avoids a full sort.
+                d2 = self.norms - 2.0 * (self.vectors @ q[0]) + float(q[0] @ q[0])
+                top = np.argpartition(d2, k - 1)[:k]
+                order = top[np.argsort(d2[top])]
+                dist = d2[order]
+            rows = self.vectors[order] * self.scale + self.mean
+            targets = [self.targets[i] for i in order]
+        return [
+            {
+                "distance": round(float(np.sqrt(max(d, 0.0))), 4),
+                "features": {f: round(float(v), 4) for f, v in zip(self.features, row)},
+                "target": _json_value(t),
+            }
+            for d, row, t in zip(dist, rows, targets)
+        ]
+
+    def save(self, directory: str) -> None:
+        tmp_dir = f"{directory}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        with self._lock:
+            np.save(os.path.join(tmp_dir, "vectors.npy"), self.vectors)
+            meta = {
+                "features": self.features,
+                "target": self.target,
+                "mean": self.mean.tolist(),
+                "scale": self.scale.tolist(),
+                "targets": [_json_value(t) for t in self.targets],
+            }
+        with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(tmp_dir, directory)
+
+    @classmethod
+    def load(cls, directory: str):
+        with open(os.path.join(directory, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        index = cls(meta["features"], np.array(meta["mean"]), np.array(meta["scale"]), meta.get("target"))
+        vectors = np.load(os.path.join(directory, "vectors.npy"))
+        index.vectors = vectors
+        index.norms = np.einsum("ij,ij->i", vectors, vectors) if len(vectors) else np.empty(0, dtype=np.float32)
+        index.targets = meta.get("targets") or [None] * len(vectors)
+        if index._faiss is not None and len(vectors):
+            index._faiss.add(vectors)
+        return index
+
+
+def _to_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def _json_value(value):
+    if value is None:
+        return None
+    if isinstance(value, (np.generic,)):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+
+def _index_dir(dataset_id: int) -> str:
+    return os.path.join(SIMILARITY_INDEX_DIR, f"{dataset_id}_neighbors")
+
+
+_cache_lock = threading.Lock()
+_indexes: dict[int, PatientSimilarityIndex] = {}
+
+
+def build_similarity_index(dataset_id: int, df: pd.DataFrame, target: str | None = None):
+    """Builds (or rebuilds) and saves the similar-patient index for a dataset."""
+    index = PatientSimilarityIndex.create(df, target)
+    if index is None:
+        return None
+    index.add_rows(df)
+    os.makedirs(SIMILARITY_INDEX_DIR, exist_ok=True)
+    index.save(_index_dir(dataset_id))
+    with _cache_lock:
+        _indexes[dataset_id] = index
+    return index
+
+
+def get_similarity_index(dataset_id: int | None):
+    """Returns the in-memory index for a dataset, loading it from disk once; None if not built."""
+    if dataset_id is None:
+        return None
+    with _cache_lock:
+        index = _indexes.get(dataset_id)
+    if index is not None:
+        return index
+    directory = _index_dir(dataset_id)
+    if not os.path.exists(os.path.join(directory, "meta.json")):
+        return None
+    index = PatientSimilarityIndex.load(directory)
+    with _cache_lock:
+        _indexes[dataset_id] = index
+    return index
+
+
+def evict_similarity_index(dataset_id: int) -> None:
+    with _cache_lock:
+        _indexes.pop(dataset_id, None)
+    shutil.rmtree(_index_dir(dataset_id), ignore_errors=True)
+
+
+def find_similar_patients(dataset_id: int | None, answers: dict, k: int = 5) -> list[dict]:
+    """The k nearest raw dataset rows; only for callers allowed to read the dataset itself."""
+    index = get_similarity_index(dataset_id)
+    if index is None:
+        return []
+    return index.query(answers, k)
+
+
+def summarize_similar_patients(dataset_id: int | None, answers: dict, k: int = 10) -> dict | None:
+    """
+    Non-identifying view of the k (at least SUMMARY_MIN_NEIGHBOURS) nearest rows, for callers who
+    may not read the dataset: their distances, outcome counts and how far the neighbours' mean
+    feature values lie from the given answers. None when the dataset has too few indexed rows.
+    """
+    neighbours = find_similar_patients(dataset_id, answers, max(k, SUMMARY_MIN_NEIGHBOURS))
+    if len(neighbours) < SUMMARY_MIN_NEIGHBOURS:
+        return None
+    lower = {str(key).lower(): value for key, value in answers.items()}
+    deltas = {}
+    for feature in neighbours[0]["features"]:
+        answer = _to_float(lower.get(feature.lower()))
+        if np.isfinite(answer):
+            mean = sum(n["features"][feature] for n in neighbours) / len(neighbours)
+            deltas[feature] = round(mean - answer, 4)
+    outcomes = Counter(str(n["target"]) for n in neighbours if n["target"] is not None)
+    return {
+        "neighbours": len(neighbours),
+        "distances": [n["distance"] for n in neighbours],
+        "outcomes": dict(outcomes),
+        "mean_feature_deltas": deltas,
+    }
@@ -5,7 +5,7 @@ class DiseasePredictionTabNet:
     """
     Wrapper for TabNetClassifier to be used with Chaos Optimization.
     """
-    def __init__(self, params=None):
+    def __init__(self, params=None, seed=0):
         if params is None:
             # Defaults
             params = {
@@ -25,17 +25,18 @@ class DiseasePredictionTabNet:
             optimizer_params=params["optimizer_params"],
             momentum=params["momentum"],
             verbose=0,
+            seed=seed,
             optimizer_fn=torch.optim.Adam
         )
         
-    def fit(self, X_train, y_train, X_valid, y_valid):
+    def fit(self, X_train, y_train, X_valid, y_valid, max_epochs=50, patience=20):
         self.model.fit(
             X_train=X_train, y_train=y_train,
             eval_set=[(X_valid, y_valid)],
             eval_name=['valid'],
             eval_metric=['accuracy'],
-            max_epochs=50, # Keep low for optimization speed
-            patience=20,
+            max_epochs=max_epochs, # Keep low for optimization speed
+            patience=patience,
             batch_size=256, 
             virtual_batch_size=128,
             num_workers=0,
@@ -6,9 +6,13 @@ import pickle
 import os
 
 from ml.chaos_optimizer import ChaosOptimizer
+from ml.kfold import KFoldEvaluator
 from ml.tabnet_model import DiseasePredictionTabNet
 from ml.utils import DataPreprocessor
 
+# Share of each training fold held out for early stopping, so the fold's score is not tuned on
+EARLY_STOPPING_SIZE = 0.15
+
 # Mock Dataset Generator for demonstration if no CSV provided
 def generate_mock_data(n_samples=1000):
     np.random.seed(42)
@@ -25,7 +29,20 @@ def generate_mock_data(n_samples=1000):
     }
     return pd.DataFrame(data)
 
-def train_pipeline(data_path=None, target_col='has_heart_disease', save_path='model_heart.zip'):
+def score_fold(params, X_train, y_train, X_valid, y_valid, seed):
+    # One cross-validation fold of a chaos trial (runs in a KFoldEvaluator worker process).
+    # Early stopping watches a holdout carved from the training fold, never the fold being scored.
+    X_fit, X_stop, y_fit, y_stop = train_test_split(
+        X_train, y_train,
+        test_size=EARLY_STOPPING_SIZE,
+        random_state=seed,
+        stratify=y_train if len(np.unique(y_train)) > 1 else None
+    )
+    model = DiseasePredictionTabNet(params, seed=seed)
+    model.fit(X_fit, y_fit, X_stop, y_stop)
+    return accuracy_score(y_valid, model.predict(X_valid))
+
+def train_pipeline(data_path=None, target_col='has_heart_disease', save_path='model_heart.zip', cv_folds=5):
     print(f"--- Starting Training Pipeline for {target_col} ---")
     
     # 1. Load Data
@@ -44,19 +61,13 @@ def train_pipeline(data_path=None, target_col='has_heart_disease', save_path='mo
     
     X_train, X_valid, y_train, y_valid = train_test_split(X, y, test_size=0.3, random_state=42)
     
-    # 3. Define Evaluation Function for Chaos Optimizer
-    def evaluate_model(params):
-        model = DiseasePredictionTabNet(params)
-        model.fit(X_train, y_train, X_valid, y_valid)
-        preds = model.predict(X_valid)
-        return accuracy_score(y_valid, preds)
-    
-    # 4. Run Chaos Optimization
+    # 3./4. Run Chaos Optimization, scoring each trial by K-fold CV on the training split
     optimizer = ChaosOptimizer(n_iterations=10) # 10 iterations for speed
-    best_params, best_score = optimizer.optimize(evaluate_model)
+    with KFoldEvaluator(score_fold, X_train, y_train, n_splits=cv_folds, seed=42) as evaluate_model:
+        best_params, best_score = optimizer.optimize(evaluate_model)
     
     print(f"Best Params: {best_params}")
-    print(f"Best Validation Accuracy: {best_score:.4f}")
+    print(f"Best CV Accuracy: {best_score:.4f}")
     
     # 5. Train Final Model with Best Params
     final_model = DiseasePredictionTabNet(best_params)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, JSON, Text
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, JSON, Text, Index
 from sqlalchemy.orm import relationship
 from database import Base
 from datetime import datetime
@@ -30,17 +30,22 @@ class Dataset(Base):
     metadata_info = Column(JSON, default={})
     disease_type = Column(String, index=True) # e.g., "Heart Disease"
     is_processed = Column(Boolean, default=False)
+    record_count = Column(Integer, default=0) # rows in the dataset's record_storage table
 
     owner = relationship("User", back_populates="uploads")
+
+    # Admin dashboard listings: WHERE user_id = ? ORDER BY upload_date DESC
+    __table_args__ = (Index("ix_datasets_user_upload_date", "user_id", "upload_date"),)
     records = relationship("PatientRecord", back_populates="dataset")
     chunks = relationship("DatasetChunk", back_populates="dataset")
 
 
 class PatientRecord(Base):
+    # Partitioned parent on PostgreSQL; rows are written and read per dataset through record_storage
     __tablename__ = "patient_records"
 
     id = Column(Integer, primary_key=True, index=True)
-    dataset_id = Column(Integer, ForeignKey("datasets.id"), nullable=True)
+    dataset_id = Column(Integer, ForeignKey("datasets.id"), nullable=True, index=True)
     
     # Clinical Features (Stored dynamically to support multiple disease types)
     data = Column(JSON)
@@ -76,8 +81,20 @@ class Prediction(Base):
     risk_scores = Column(JSON) # e.g., {"heart": 85.5, "diabetes": 12.0}
     explanations = Column(JSON) # SHAP values or feature importances
     
+    # Typed copies of the headline result, so dashboard stats are SQL aggregates
+    risk_score = Column(Float, nullable=True) # 0-100, None when only a heuristic label was produced
+    risk_label = Column(String, nullable=True) # e.g., "High Risk"
+    disease_type = Column(String, nullable=True)
+    
     user = relationship("User", back_populates="predictions")
 
+    __table_args__ = (
+        # Supports keyset-paginated history: WHERE user_id = ? ORDER BY timestamp DESC, id DESC
+        Index("ix_predictions_user_timestamp_id", "user_id", "timestamp", "id"),
+        # Covers the per-disease user stats aggregate (index-only scan)
+        Index("ix_predictions_user_disease_stats", "user_id", "disease_type", "timestamp", "risk_score", "risk_label"),
+    )
+
 class DatasetChunk(Base):
     __tablename__ = "dataset_chunks"
 
@@ -116,6 +133,9 @@ class ChatMessage(Base):
     
     session = relationship("ChatSession", back_populates="messages")
 
+    # Supports keyset-paginated chat history: WHERE session_id = ? ORDER BY timestamp, id
+    __table_args__ = (Index("ix_chat_messages_session_timestamp_id", "session_id", "timestamp", "id"),)
+
 # Update User relationship
 User.chat_sessions = relationship("ChatSession", back_populates="user")
 
@@ -0,0 +1,54 @@
+import base64
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def clamp_limit(limit: int | None) -> int:
+    if limit is None:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(int(limit), MAX_PAGE_SIZE))
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    raw = f"{timestamp.isoformat()}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, row_id = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8").split("|", 1)
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def keyset_page(db, stmt, timestamp_col, id_col, cursor: str | None, limit: int, descending: bool = False):
+    """
+    Applies keyset pagination on (timestamp, id) to the select `stmt`, runs it on the async session
+    `db` and returns (rows, next_cursor).
+
+    Rows must expose `timestamp` and `id` attributes. Seeks past the cursor instead of using OFFSET,
+    so every page is an index range scan on (..., timestamp, id) regardless of how deep it is.
+    """
+    if cursor:
+        ts, row_id = decode_cursor(cursor)
+        if descending:
+            stmt = stmt.where(or_(timestamp_col < ts, and_(timestamp_col == ts, id_col < row_id)))
+        else:
+            stmt = stmt.where(or_(timestamp_col > ts, and_(timestamp_col == ts, id_col > row_id)))
+    if descending:
+        stmt = stmt.order_by(timestamp_col.desc(), id_col.desc())
+    else:
+        stmt = stmt.order_by(timestamp_col.asc(), id_col.asc())
+
+    rows = (await db.execute(stmt.limit(limit + 1))).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(rows[-1].timestamp, rows[-1].id) if has_more and rows else None
+    return rows, next_cursor
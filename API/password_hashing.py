@@ -0,0 +1,103 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+# PBKDF2-SHA256 iterations for new hashes; existing hashes keep verifying with the rounds they were
+# created with. Pick a value with scripts/benchmark_password_hashing.py (passlib's default is 29000).
+PBKDF2_ROUNDS = int(os.getenv("PBKDF2_ROUNDS", "29000"))
+# Dedicated hashing threads, kept separate from the Starlette threadpool that serves requests.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+# Hash/verify calls allowed to wait for a worker; beyond that requests are rejected with 503.
+PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", "32"))
+PASSWORD_HASH_TIMEOUT_SECONDS = float(os.getenv("PASSWORD_HASH_TIMEOUT_SECONDS", "5"))
+
+pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto", pbkdf2_sha256__rounds=PBKDF2_ROUNDS)
+
+
+class PasswordHashingBusy(Exception):
+    """The hashing queue is full or the call timed out; callers should answer 503."""
+
+
+class PasswordHasher:
+    """
+    Size-limited executor for password hashing and verification.
+
+    At most `workers` hashes run at once and at most `queue_size` more wait; further calls fail
+    fast with PasswordHashingBusy instead of piling up. A call that times out stops being awaited
+    but keeps its slot until the worker finishes, so the bound holds even under timeouts.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, queue_size: int = PASSWORD_HASH_QUEUE_SIZE, timeout_seconds: float = PASSWORD_HASH_TIMEOUT_SECONDS):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout_seconds = timeout_seconds
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._lock = threading.Lock()
+        self._metrics = {
+            "submitted": 0,
+            "completed": 0,
+            "rejected": 0,
+            "timed_out": 0,
+            "in_flight": 0,
+            "total_seconds": 0.0,
+            "max_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+        }
+
+    def _count(self, key: str, amount=1) -> None:
+        with self._lock:
+            self._metrics[key] += amount
+
+    def _run(self, func, args, submitted_at: float):
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                m = self._metrics
+                m["completed"] += 1
+                m["in_flight"] -= 1
+                m["total_seconds"] += finished - started
+                m["max_seconds"] = max(m["max_seconds"], finished - started)
+                m["max_wait_seconds"] = max(m["max_wait_seconds"], started - submitted_at)
+            self._slots.release()
+
+    async def _submit(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            self._count("rejected")
+            raise PasswordHashingBusy("Password hashing queue is full")
+        with self._lock:
+            self._metrics["submitted"] += 1
+            self._metrics["in_flight"] += 1
+        future = self._executor.submit(self._run, func, args, time.perf_counter())
+        try:
+            # shield: a timed-out call must not cancel a queued job, or its slot would never be released
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout=self.timeout_seconds)
+        except asyncio.TimeoutError:
+            self._count("timed_out")
+            raise PasswordHashingBusy("Password hashing timed out")
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(pwd_context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._submit(pwd_context.verify, password, hashed_password)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            snapshot = dict(self._metrics)
+        snapshot["queued"] = max(0, snapshot["in_flight"] - self.workers)
+        snapshot["workers"] = self.workers
+        snapshot["queue_size"] = self.queue_size
+        snapshot["rounds"] = PBKDF2_ROUNDS
+        snapshot["avg_seconds"] = snapshot["total_seconds"] / snapshot["completed"] if snapshot["completed"] else 0.0
+        return snapshot
+
+
+password_hasher = PasswordHasher()
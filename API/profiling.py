@@ -0,0 +1,200 @@
+"""
+Opt-in per-request profiling.
+
+ProfilingMiddleware marks a request for profiling when an admin sends `X-Profile: 1` or when it
+is picked by PROFILE_SAMPLE_RATE. Handlers (or the blocking helpers they call) decorated with
+@profiled(name) then run under a profiler for that request only; everything else is untouched.
+
+PROFILE_MODE=sampler (default) samples the wall-clock stack of the handler's thread every
+PROFILE_INTERVAL_SECONDS and writes folded stacks (`.folded`, one "a;b;c count" line per stack),
+which flamegraph.pl and speedscope read directly. PROFILE_MODE=cprofile writes a pstats dump
+(`.prof`) for snakeviz / flameprof. At most PROFILE_MAX_FILES profiles are kept in PROFILE_DIR;
+the oldest are deleted first.
+"""
+import contextvars
+import cProfile
+import functools
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+
+from auth import principal_from_claims
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "profiles"))
+# Share of all requests profiled without being asked (0 disables sampling; the admin header still works).
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_MODE = os.getenv("PROFILE_MODE", "sampler")
+PROFILE_INTERVAL_SECONDS = float(os.getenv("PROFILE_INTERVAL_SECONDS", "0.005"))
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "100"))
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+# Set by ProfilingMiddleware for requests that should be profiled; copied into threadpool calls
+# and (explicitly) into the regeneration job thread.
+_profile_request: contextvars.ContextVar["ProfileRequest | None"] = contextvars.ContextVar("profile_request", default=None)
+_rotate_lock = threading.Lock()
+
+
+class ProfileRequest:
+    __slots__ = ("id", "reason", "written")
+
+    def __init__(self, reason: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.reason = reason  # "header" or "sampled"
+        self.written: list[str] = []  # profile files saved so far
+
+
+def _requested_by_admin(scope) -> bool:
+    headers = dict(scope.get("headers") or [])
+    if headers.get(PROFILE_HEADER, b"").strip().lower() not in (b"1", b"true", b"yes"):
+        return False
+    authorization = headers.get(b"authorization", b"").decode("latin-1")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    principal = principal_from_claims(token)
+    return principal is not None and principal.role == "admin"
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware deciding per request whether @profiled code runs under the profiler."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if _requested_by_admin(scope):
+            request = ProfileRequest("header")
+        elif PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+            request = ProfileRequest("sampled")
+        else:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            # Tells the caller which profile file(s) belong to this request. Only set when one was
+            # already written: not for routes without @profiled code, runs shorter than one sample,
+            # or work that outlives the response (the regeneration job).
+            if message["type"] == "http.response.start" and request.reason == "header" and request.written:
+                message = {**message, "headers": [*message.get("headers", []), (PROFILE_ID_HEADER, request.id.encode("ascii"))]}
+            await send(message)
+
+        token = _profile_request.set(request)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _profile_request.reset(token)
+
+
+class StackSampler:
+    """Wall-clock sampler of one thread's Python stack, aggregated as folded stacks."""
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_INTERVAL_SECONDS):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def __enter__(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _rotate() -> None:
+    """Deletes the oldest profiles beyond PROFILE_MAX_FILES."""
+    with _rotate_lock:
+        entries = [e for e in os.scandir(PROFILE_DIR) if e.is_file() and e.name.endswith((".folded", ".prof"))]
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for entry in entries[: max(0, len(entries) - PROFILE_MAX_FILES)]:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+
+def _profile_path(name: str, request: ProfileRequest, suffix: str) -> str:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    return os.path.join(PROFILE_DIR, f"{stamp}-{name}-{request.id}{suffix}")
+
+
+def _run_profiled(name: str, request: ProfileRequest, func, args, kwargs):
+    started = time.perf_counter()
+    if PROFILE_MODE == "cprofile":
+        path = _profile_path(name, request, ".prof")
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(func, *args, **kwargs)
+        finally:
+            profiler.dump_stats(path)
+            _finish(name, request, path, started)
+    path = _profile_path(name, request, ".folded")
+    sampler = StackSampler(threading.get_ident())
+    try:
+        with sampler:
+            return func(*args, **kwargs)
+    finally:
+        if sampler.stacks:
+            sampler.write(path)
+            _finish(name, request, path, started)
+        else:
+            print(f"Profiled {name} ({request.reason}): finished before the first sample, nothing written")
+
+
+def _finish(name: str, request: ProfileRequest, path: str, started: float) -> None:
+    request.written.append(path)
+    print(f"Profiled {name} ({request.reason}, {time.perf_counter() - started:.3f}s) -> {path}")
+    _rotate()
+
+
+def profiled(name: str):
+    """
+    Runs the decorated sync function under the profiler when the current request asked for it.
+    Use on sync handlers and on the blocking helpers async handlers send to the threadpool.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            request = _profile_request.get()
+            if request is None:
+                return func(*args, **kwargs)
+            return _run_profiled(name, request, func, args, kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def install_profiling(app) -> None:
+    app.add_middleware(ProfilingMiddleware)
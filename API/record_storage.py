@@ -0,0 +1,136 @@
+"""
+Per-dataset storage of uploaded patient rows.
+
+Every dataset's rows live in their own table `patient_records_d<dataset_id>`. On PostgreSQL that
+table is a LIST partition of `patient_records` (attached once loaded), so queries on the parent
+still see every row and pruning keeps per-dataset scans off other datasets. On SQLite, which has
+no partitioning, the per-dataset tables stand alone. Either way dropping a dataset is a
+detach + DROP TABLE instead of deleting its rows one by one.
+"""
+import re
+import threading
+
+from sqlalchemy import JSON, Column, Integer, MetaData, Table, func, insert, inspect, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+PARENT_TABLE = "patient_records"
+# Rows per INSERT executemany batch when loading an upload
+INSERT_BATCH_ROWS = 5000
+
+_TABLE_RE = re.compile(r"^patient_records_d(\d+)$")
+_metadata = MetaData()
+_metadata_lock = threading.Lock()
+
+
+def table_name(dataset_id: int) -> str:
+    return f"{PARENT_TABLE}_d{int(dataset_id)}"
+
+
+def _conn(db: Session | Connection) -> Connection:
+    # Accepts a Session (request/script code) or a Connection (migrations)
+    return db.connection() if isinstance(db, Session) else db
+
+
+def uses_partitions(db: Session | Connection) -> bool:
+    return _conn(db).dialect.name == "postgresql"
+
+
+def _table(dataset_id: int) -> Table:
+    name = table_name(dataset_id)
+    with _metadata_lock:
+        table = _metadata.tables.get(name)
+        if table is None:
+            table = Table(
+                name,
+                _metadata,
+                Column("id", Integer, primary_key=True),
+                Column("dataset_id", Integer, nullable=False),
+                Column("data", JSON),
+            )
+        return table
+
+
+def _is_attached(db: Session | Connection, name: str) -> bool:
+    return db.execute(
+        text("SELECT 1 FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid WHERE c.relname = :name"),
+        {"name": name},
+    ).first() is not None
+
+
+def create_dataset_storage(db: Session | Connection, dataset_id: int) -> None:
+    """Creates the (not yet attached) table a dataset's rows are loaded into."""
+    dataset_id = int(dataset_id)
+    name = table_name(dataset_id)
+    if uses_partitions(db):
+        # Shares the parent's id sequence; the CHECK lets ATTACH skip its validation scan.
+        db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} "
+            f"(LIKE {PARENT_TABLE} INCLUDING DEFAULTS, CHECK (dataset_id IS NOT NULL AND dataset_id = {dataset_id}))"
+        ))
+    else:
+        _table(dataset_id).create(bind=_conn(db), checkfirst=True)
+
+
+def insert_records(db: Session | Connection, dataset_id: int, rows: list[dict]) -> int:
+    """Bulk-inserts JSON rows into the dataset's table; returns the number of rows written."""
+    table = _table(dataset_id)
+    for start in range(0, len(rows), INSERT_BATCH_ROWS):
+        batch = rows[start:start + INSERT_BATCH_ROWS]
+        db.execute(insert(table), [{"dataset_id": int(dataset_id), "data": row} for row in batch])
+    return len(rows)
+
+
+def attach_dataset_storage(db: Session | Connection, dataset_id: int) -> None:
+    """Makes a loaded dataset table visible through the partitioned parent (PostgreSQL only)."""
+    if not uses_partitions(db):
+        return
+    dataset_id = int(dataset_id)
+    if not _is_attached(db, table_name(dataset_id)):
+        db.execute(text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {table_name(dataset_id)} FOR VALUES IN ({dataset_id})"))
+
+
+def load_records(db: Session | Connection, dataset_id: int) -> list[dict]:
+    """All non-empty JSON rows of a dataset, in upload order."""
+    if not has_dataset_storage(db, dataset_id):
+        return []
+    table = _table(dataset_id)
+    return [row for row in db.execute(select(table.c.data).order_by(table.c.id)).scalars() if row]
+
+
+def count_records(db: Session | Connection, dataset_id: int) -> int:
+    if not has_dataset_storage(db, dataset_id):
+        return 0
+    return db.execute(select(func.count()).select_from(_table(dataset_id))).scalar() or 0
+
+
+def has_dataset_storage(db: Session | Connection, dataset_id: int) -> bool:
+    return inspect(_conn(db)).has_table(table_name(dataset_id))
+
+
+def drop_dataset_storage(db: Session | Connection, dataset_id: int) -> None:
+    """Removes all rows of a dataset in O(1): detach the partition (PostgreSQL) and drop its table."""
+    name = table_name(dataset_id)
+    if uses_partitions(db):
+        if _is_attached(db, name):
+            db.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+    db.execute(text(f"DROP TABLE IF EXISTS {name}"))
+    with _metadata_lock:
+        table = _metadata.tables.get(name)
+        if table is not None:
+            _metadata.remove(table)
+
+
+def dataset_storage_ids(db: Session | Connection) -> list[int]:
+    """Dataset ids that currently have a records table."""
+    ids = []
+    for name in inspect(_conn(db)).get_table_names():
+        match = _TABLE_RE.match(name)
+        if match:
+            ids.append(int(match.group(1)))
+    return sorted(ids)
+
+
+def drop_all_dataset_storage(db: Session | Connection) -> None:
+    for dataset_id in dataset_storage_ids(db):
+        drop_dataset_storage(db, dataset_id)
@@ -1,6 +1,9 @@
 from database import SessionLocal
-from models import Dataset, PatientRecord
+from models import Dataset
+from record_storage import load_records
 from dataset_service import process_uploaded_dataset
+from ml.risk_model import train_dataset_risk_model
+from ml.similarity_index import build_similarity_index
 import pandas as pd
 
 def reprocess():
@@ -13,20 +16,18 @@ def reprocess():
         print(f"Processing {dataset.filename}...")
         
         # 1. Fetch records
-        records = db.query(PatientRecord).filter(PatientRecord.dataset_id == dataset.id).all()
-        if not records:
-            print(f"No records found for {dataset.filename}. Skipping.")
-            continue
-            
-        data = [r.data for r in records if r.data]
+        data = load_records(db, dataset.id)
         if not data:
-            print("Records have no JSON data. Skipping.")
+            print(f"No records found for {dataset.filename}. Skipping.")
             continue
             
         df = pd.DataFrame(data)
         
         # 2. Process
-        process_uploaded_dataset(dataset.id, dataset.filename, df, db)
+        processed = process_uploaded_dataset(dataset.id, dataset.filename, df, db)
+        meta = processed.metadata_info or {}
+        train_dataset_risk_model(dataset.id, df, meta.get("suspected_target"), meta.get("feature_ranking"))
+        build_similarity_index(dataset.id, df, meta.get("suspected_target"))
         print(f"Successfully processed {dataset.filename}.")
         
     db.close()
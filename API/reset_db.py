@@ -1,9 +1,17 @@
+from sqlalchemy import text
+
 from database import engine, Base
-from models import User, Dataset, PatientRecord, Prediction
+import models  # noqa: F401  (registers the tables on Base.metadata for drop_all)
+from migrations import MIGRATIONS_TABLE, run_migrations
+from record_storage import drop_all_dataset_storage
 
 print("Resetting database tables...")
-# Drop all tables to apply the new schema (PatientRecord change to JSON)
+# Drop all tables (and per-dataset record storage) so the migrations rebuild the schema from scratch
+with engine.begin() as conn:
+    drop_all_dataset_storage(conn)
 Base.metadata.drop_all(bind=engine)
+with engine.begin() as conn:
+    conn.execute(text(f"DROP TABLE IF EXISTS {MIGRATIONS_TABLE}"))
 # Re-create all tables
-Base.metadata.create_all(bind=engine)
+run_migrations(engine)
 print("Database schema updated successfully!")
@@ -0,0 +1,231 @@
+"""
+Microbenchmarks for the ML hot paths: preprocessing, TabNet training per epoch, predict_proba per
+batch size and chaos optimization per trial, on generate_mock_data scaled to the requested rows.
+
+Record a run, then compare it with an earlier one (exits 1 when a case got slower than allowed):
+    python scripts/benchmark_ml.py run --rows 10000 100000 1000000 --output bench/candidate.json
+    python scripts/benchmark_ml.py compare bench/baseline.json bench/candidate.json --threshold 0.10
+
+Case names are stable ("predict_proba[batch=64]") so files from different commits line up.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, API_DIR)
+
+from ml.chaos_optimizer import ChaosOptimizer
+from ml.tabnet_model import DiseasePredictionTabNet
+from ml.train import generate_mock_data
+from ml.utils import DataPreprocessor
+
+TARGET = "has_heart_disease"
+DEFAULT_OUTPUT = os.path.join(API_DIR, ".cache", "benchmarks", "ml-{timestamp}.json")
+
+
+def _time(func, repeat: int, number: int = 1) -> list[float]:
+    """Seconds per call of func(), for `repeat` samples of `number` back-to-back calls (after one warm-up call)."""
+    func()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - started) / number)
+    return samples
+
+
+def _case(name: str, samples: list[float], unit: str = "s", **params) -> dict:
+    result = {
+        "name": name,
+        "unit": unit,
+        "params": params,
+        "samples": len(samples),
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+    print(f"{name:<40} median {result['median'] * 1000:10.3f} ms  (min {result['min'] * 1000:.3f} ms, n={len(samples)})")
+    return result
+
+
+def _mock_data(rows: int):
+    df = generate_mock_data(rows)
+    # generate_mock_data has no gaps; blank a few values so the imputation path is exercised
+    df.loc[df.sample(frac=0.01, random_state=0).index, "bmi"] = np.nan
+    return df
+
+
+def _bench_preprocessing(rows_list: list[int], repeat: int) -> list[dict]:
+    results = []
+    for rows in rows_list:
+        df = _mock_data(rows)
+        results.append(_case(f"preprocess_train[rows={rows}]", _time(lambda: DataPreprocessor().preprocess_train(df), repeat), rows=rows))
+
+    preprocessor = DataPreprocessor()
+    sample = _mock_data(1000)
+    preprocessor.preprocess_train(sample)
+    row = sample.drop(columns=[TARGET]).iloc[0].to_dict()
+    results.append(_case("preprocess_inference[rows=1]", _time(lambda: preprocessor.preprocess_inference(row), repeat, number=50)))
+    return results
+
+
+def _training_arrays(rows: int):
+    df = DataPreprocessor().preprocess_train(_mock_data(rows))
+    X = df.drop(columns=[TARGET]).values.astype(np.float32)
+    y = df[TARGET].values
+    split = int(len(X) * 0.8)
+    return X[:split], y[:split], X[split:], y[split:]
+
+
+def _bench_training(fit_rows: int, epochs: int, repeat: int):
+    X_train, y_train, X_valid, y_valid = _training_arrays(fit_rows)
+    samples = []
+    model = None
+    # The first fit also pays for torch's lazy initialisation; it is run but not recorded
+    for i in range(repeat + 1):
+        model = DiseasePredictionTabNet()
+        started = time.perf_counter()
+        # patience=0 disables early stopping so every sample runs exactly `epochs` epochs
+        model.fit(X_train, y_train, X_valid, y_valid, max_epochs=epochs, patience=0)
+        if i:
+            samples.append((time.perf_counter() - started) / epochs)
+    return _case(f"tabnet_fit_epoch[rows={fit_rows}]", samples, rows=fit_rows, epochs=epochs), model, X_valid
+
+
+def _bench_predict(model, X: np.ndarray, batch_sizes: list[int], repeat: int) -> list[dict]:
+    results = []
+    for batch in batch_sizes:
+        rows = np.resize(X, (batch, X.shape[1])) if batch > len(X) else X[:batch]
+        number = max(1, 256 // batch)
+        results.append(_case(f"predict_proba[batch={batch}]", _time(lambda: model.predict_proba(rows), repeat, number=number), batch=batch))
+    return results
+
+
+def _bench_chaos(fit_rows: int, trials: int, epochs: int, repeat: int) -> dict:
+    X_train, y_train, X_valid, y_valid = _training_arrays(fit_rows)
+
+    def evaluate(params):
+        model = DiseasePredictionTabNet(params)
+        model.fit(X_train, y_train, X_valid, y_valid, max_epochs=epochs, patience=0)
+        return float((model.predict(X_valid) == y_valid).mean())
+
+    samples = []
+    for _ in range(repeat):
+        optimizer = ChaosOptimizer(n_iterations=trials)
+        started = time.perf_counter()
+        optimizer.optimize(evaluate, x0=0.3141)
+        samples.append((time.perf_counter() - started) / max(1, len(optimizer.history)))
+    return _case(f"chaos_trial[rows={fit_rows}]", samples, rows=fit_rows, trials=trials, epochs=epochs)
+
+
+def _environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=API_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        commit = None
+    try:
+        import torch
+
+        torch_version, threads = torch.__version__, torch.get_num_threads()
+    except Exception:
+        torch_version, threads = None, None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "torch": torch_version,
+        "torch_threads": threads,
+    }
+
+
+def run(args) -> None:
+    only = set(args.only or [])
+    selected = lambda group: not only or group in only
+    results = []
+    if selected("preprocess"):
+        results += _bench_preprocessing(args.rows, args.repeat)
+    if selected("fit") or selected("predict"):
+        fit_case, model, X_valid = _bench_training(args.fit_rows, args.epochs, args.repeat)
+        if selected("fit"):
+            results.append(fit_case)
+        if selected("predict"):
+            results += _bench_predict(model, X_valid, args.batch_sizes, args.repeat)
+    if selected("chaos"):
+        results.append(_bench_chaos(args.fit_rows, args.trials, args.epochs, args.repeat))
+
+    output = args.output or DEFAULT_OUTPUT.format(timestamp=datetime.now().strftime("%Y%m%d-%H%M%S"))
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"created_at": datetime.now().isoformat(), "environment": _environment(), "results": results}, f, indent=2)
+    print(f"Wrote {len(results)} results to {output}")
+
+
+def compare(args) -> int:
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = {r["name"]: r for r in json.load(f)["results"]}
+    with open(args.candidate, encoding="utf-8") as f:
+        candidate = {r["name"]: r for r in json.load(f)["results"]}
+
+    regressions = []
+    print(f"{'case':<40} {'baseline ms':>12} {'candidate ms':>13} {'change':>8}")
+    for name, new in candidate.items():
+        old = baseline.get(name)
+        if old is None:
+            print(f"{name:<40} {'-':>12} {new['median'] * 1000:13.3f} {'new':>8}")
+            continue
+        change = new["median"] / old["median"] - 1 if old["median"] else 0.0
+        flag = ""
+        if change > args.threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<40} {old['median'] * 1000:12.3f} {new['median'] * 1000:13.3f} {change:+8.1%}{flag}")
+    for name in baseline.keys() - candidate.keys():
+        print(f"{name:<40} missing from candidate")
+
+    if regressions:
+        print(f"{len(regressions)} case(s) slower than the {args.threshold:.0%} threshold")
+        return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="Run the benchmarks and write a JSON result file")
+    run_parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000], help="Row counts for preprocess_train")
+    run_parser.add_argument("--fit-rows", type=int, default=10_000, help="Rows used for TabNet fit/predict/chaos cases")
+    run_parser.add_argument("--epochs", type=int, default=3, help="Epochs per timed fit (reported per epoch)")
+    run_parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 64, 512, 4096])
+    run_parser.add_argument("--trials", type=int, default=3, help="Chaos optimizer trials per sample (reported per trial)")
+    run_parser.add_argument("--repeat", type=int, default=5, help="Samples per case")
+    run_parser.add_argument("--only", nargs="+", choices=["preprocess", "fit", "predict", "chaos"])
+    run_parser.add_argument("--output", help="Result file (default: API/.cache/benchmarks/ml-<timestamp>.json)")
+
+    compare_parser = sub.add_parser("compare", help="Compare two result files by median time per case")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="Allowed slowdown before failing (0.10 = 10%%)")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    else:
+        sys.exit(compare(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmarks PBKDF2-SHA256 hash/verify cost per round count and the throughput of the bounded
+hashing pool, to choose PBKDF2_ROUNDS / PASSWORD_HASH_WORKERS for a deployment.
+
+    python scripts/benchmark_password_hashing.py --rounds 29000 100000 300000 --target-ms 100
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+from passlib.hash import pbkdf2_sha256
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from password_hashing import PASSWORD_HASH_WORKERS, PasswordHasher, PasswordHashingBusy
+
+
+def _time_rounds(rounds: int, samples: int) -> tuple[float, float]:
+    hasher = pbkdf2_sha256.using(rounds=rounds)
+    hash_times, verify_times = [], []
+    for i in range(samples):
+        started = time.perf_counter()
+        hashed = hasher.hash(f"benchmark-password-{i}")
+        hash_times.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        hasher.verify(f"benchmark-password-{i}", hashed)
+        verify_times.append(time.perf_counter() - started)
+    return statistics.median(hash_times) * 1000, statistics.median(verify_times) * 1000
+
+
+async def _burst(requests: int, workers: int, queue_size: int) -> dict:
+    """Fires a login storm at a pool and reports how many calls were served vs shed."""
+    pool = PasswordHasher(workers=workers, queue_size=queue_size)
+    hashed = await pool.hash("benchmark-password")
+
+    async def one():
+        try:
+            await pool.verify("benchmark-password", hashed)
+            return True
+        except PasswordHashingBusy:
+            return False
+
+    started = time.perf_counter()
+    served = sum(await asyncio.gather(*(one() for _ in range(requests))))
+    elapsed = time.perf_counter() - started
+    metrics = pool.metrics()
+    return {"served": served, "rejected": metrics["rejected"], "seconds": elapsed, "max_wait_ms": metrics["max_wait_seconds"] * 1000}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, nargs="+", default=[29000, 100000, 200000, 600000])
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--target-ms", type=float, default=100.0, help="Desired single-hash latency")
+    parser.add_argument("--burst", type=int, default=200, help="Concurrent verifications for the pool test")
+    parser.add_argument("--workers", type=int, default=PASSWORD_HASH_WORKERS)
+    parser.add_argument("--queue-size", type=int, default=32)
+    args = parser.parse_args()
+
+    print(f"{'rounds':>10} {'hash ms':>10} {'verify ms':>10}")
+    per_round_ms = []
+    for rounds in args.rounds:
+        hash_ms, verify_ms = _time_rounds(rounds, args.samples)
+        per_round_ms.append(hash_ms / rounds)
+        print(f"{rounds:>10} {hash_ms:>10.1f} {verify_ms:>10.1f}")
+    suggested = int(args.target_ms / statistics.median(per_round_ms))
+    print(f"\nSuggested PBKDF2_ROUNDS for ~{args.target_ms:.0f} ms per hash on this machine: {suggested}")
+
+    result = asyncio.run(_burst(args.burst, args.workers, args.queue_size))
+    print(
+        f"\nBurst of {args.burst} logins on {args.workers} worker(s), queue {args.queue_size}: "
+        f"{result['served']} served, {result['rejected']} rejected (503) in {result['seconds']:.2f}s, "
+        f"max queue wait {result['max_wait_ms']:.0f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Load test for the guided chat: turns per second over REST (/chat/{id}/message) vs WebSocket
+(/chat/ws/{id}). Each simulated user starts a session and answers every question one turn at a time.
+
+Against a running server (needs `websockets` for the WebSocket side):
+    python scripts/chat_load_test.py --base-url http://localhost:8000 --email user@example.com --password secret
+
+In process, on a throwaway SQLite database seeded with a synthetic processed dataset:
+    python scripts/chat_load_test.py --in-process --sessions 200 --concurrency 8
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DISEASE = "Heart Disease"
+FEATURES = ["age", "blood_pressure", "cholesterol", "chest_pain", "resting_ecg", "max_heart_rate", "exercise_angina", "oldpeak"]
+
+
+def _answer(feature: str) -> str:
+    return str(40 + len(feature))
+
+
+class RestTransport:
+    def __init__(self, client, headers):
+        self.client = client
+        self.headers = headers
+
+    def run_session(self) -> int:
+        response = self.client.post("/chat/start", params={"disease_context": DISEASE}, headers=self.headers)
+        response.raise_for_status()
+        session_id = response.json()["session_id"]
+        turns = 0
+        status = "active"
+        while status != "completed":
+            state = self.client.post(
+                f"/chat/{session_id}/message", params={"content": _answer(FEATURES[turns % len(FEATURES)])}, headers=self.headers
+            )
+            state.raise_for_status()
+            status = state.json()["status"]
+            turns += 1
+        return turns
+
+
+class WebSocketTransport:
+    def __init__(self, client, headers, connect):
+        self.client = client
+        self.headers = headers
+        self.connect = connect  # (session_id) -> context manager with send_text / receive_text
+
+    def run_session(self) -> int:
+        response = self.client.post("/chat/start", params={"disease_context": DISEASE}, headers=self.headers)
+        response.raise_for_status()
+        session_id = response.json()["session_id"]
+        turns = 0
+        with self.connect(session_id) as ws:
+            status = json.loads(ws.receive_text())["status"]
+            while status != "completed":
+                ws.send_text(_answer(FEATURES[turns % len(FEATURES)]))
+                status = json.loads(ws.receive_text())["status"]
+                turns += 1
+        return turns
+
+
+def _measure(name: str, transport, sessions: int, concurrency: int) -> dict:
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        turns = sum(pool.map(lambda _: transport.run_session(), range(sessions)))
+    elapsed = time.perf_counter() - started
+    result = {"transport": name, "sessions": sessions, "turns": turns, "seconds": round(elapsed, 3), "turns_per_second": round(turns / elapsed, 1)}
+    print(f"{name:<10} {turns:>6} turns in {elapsed:7.2f}s  ->  {result['turns_per_second']:>8.1f} turns/s")
+    return result
+
+
+def _in_process_clients():
+    """Real auth/chat routers on a temporary SQLite database with one synthetic processed dataset."""
+    db_path = os.path.join(tempfile.mkdtemp(prefix="chat_load_"), "load.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    sys.path.insert(0, API_DIR)
+
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    import auth
+    import chat
+    from database import Base, SessionLocal, engine
+    from models import Dataset, User
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = User(email="load@example.com", hashed_password=auth.get_password_hash("load"), full_name="Load Test", role="user")
+    db.add(user)
+    db.add(Dataset(
+        filename="heart.csv",
+        disease_type=DISEASE,
+        is_processed=True,
+        user_id=None,
+        metadata_info={"columns": FEATURES + ["target"], "suspected_target": "target", "feature_ranking": FEATURES},
+    ))
+    db.commit()
+    token = auth.create_access_token({"sub": user.email, "role": user.role, "id": user.id})
+    db.close()
+
+    app = FastAPI()
+    app.include_router(auth.router)
+    app.include_router(chat.router)
+    # Entered once so every request shares one event loop, as under uvicorn (the async engine's
+    # pooled connections belong to the loop that opened them).
+    client = TestClient(app).__enter__()
+    headers = {"Authorization": f"Bearer {token}"}
+    connect = lambda session_id: client.websocket_connect(f"/chat/ws/{session_id}?token={token}")
+    return client, headers, connect
+
+
+def _remote_clients(base_url: str, email: str, password: str):
+    import httpx
+    from websockets.sync.client import connect as ws_connect
+
+    client = httpx.Client(base_url=base_url, timeout=30)
+    response = client.post("/auth/login", params={"role": "user"}, data={"username": email, "password": password})
+    response.raise_for_status()
+    token = response.json()["access_token"]
+    ws_base = base_url.replace("https://", "wss://").replace("http://", "ws://")
+
+    class _Connection:
+        def __init__(self, session_id):
+            self._ws = ws_connect(f"{ws_base}/chat/ws/{session_id}?token={token}")
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            self._ws.close()
+
+        def send_text(self, text):
+            self._ws.send(text)
+
+        def receive_text(self):
+            return self._ws.recv()
+
+    return client, {"Authorization": f"Bearer {token}"}, _Connection
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email")
+    parser.add_argument("--password")
+    parser.add_argument("--in-process", action="store_true", help="Run against the routers in this process on a temp SQLite DB")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    if args.in_process:
+        client, headers, connect = _in_process_clients()
+    else:
+        if not args.email or not args.password:
+            parser.error("--email and --password are required unless --in-process is given")
+        client, headers, connect = _remote_clients(args.base_url, args.email, args.password)
+
+    results = [
+        _measure("rest", RestTransport(client, headers), args.sessions, args.concurrency),
+        _measure("websocket", WebSocketTransport(client, headers, connect), args.sessions, args.concurrency),
+    ]
+    speedup = results[1]["turns_per_second"] / results[0]["turns_per_second"] if results[0]["turns_per_second"] else 0.0
+    print(f"WebSocket / REST throughput: {speedup:.2f}x")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"results": results, "websocket_speedup": round(speedup, 2)}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,11 @@
 import pandas as pd
 import numpy as np
 import os
+import sys
 import glob
+from pathlib import Path
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder, StandardScaler
+from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import (
     accuracy_score, precision_score, recall_score, f1_score, roc_auc_score, confusion_matrix,
     mean_absolute_error, mean_squared_error, r2_score
@@ -12,6 +14,10 @@ from xgboost import XGBClassifier
 import torch
 from pytorch_tabnet.tab_model import TabNetClassifier
 
+# Reuse the service's cached dataset conversion (parsed, encoded, imputed arrays keyed by file hash)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from experimental_results_service import load_prepared_dataset
+
 # --- Chaos Optimization Logic (Self-Contained) ---
 class ChaosOptimizer:
     def __init__(self, n_iterations=20, r=4.0):
@@ -158,30 +164,9 @@ def evaluate_datasets():
         if "MOCK" in dataset_name: dataset_name = "DEMO DATA"
         print(f"\nProcessing {dataset_name}...")
         
-        # Load
-        if file_path.endswith('.csv'):
-            df = pd.read_csv(file_path)
-        else:
-            df = pd.read_excel(file_path)
-            
-        # Preprocess
-        # Assume last column is target if not specified
-        target_col = df.columns[-1]
-        
-        # Encode Categorical
-        le = LabelEncoder()
-        for col in df.columns:
-            if df[col].dtype == 'object':
-                df[col] = le.fit_transform(df[col].astype(str))
-        
-        # Fill NA
-        df.fillna(df.mean(), inplace=True)
-        
-        X = df.drop(columns=[target_col]).values
-        y = df[target_col].values
-        
-        # Ensure y is proper type
-        y = le.fit_transform(y)
+        # Load + Preprocess (last column is the target; categorical columns label-encoded, NA imputed).
+        # Served from the conversion cache after the first run, so Excel files are parsed only once.
+        X, y, _meta = load_prepared_dataset(Path(file_path))
         
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
         
@@ -0,0 +1,385 @@
+"""
+Async HTTP load generator for the API: virtual users run a weighted mix of scripted scenarios
+(login, tabular prediction, a full chat session, CSV upload) and the run is reported as
+p50/p95/p99 latency, throughput and error rate per request and overall.
+
+In process, on a throwaway SQLite database (no server needed):
+    python scripts/load_test.py --users 20 --duration 30 --mix login=2,predict=5,chat=2,upload=1
+
+Against a local uvicorn started by the harness on a throwaway SQLite database (needs uvicorn):
+    python scripts/load_test.py --uvicorn --users 50 --duration 60 --output load-report.json
+
+Against an already running server (users are created through /auth/signup):
+    python scripts/load_test.py --base-url http://localhost:8000 --users 20 --duration 30
+
+The in-process and --uvicorn targets serve the real auth/predict/chat routers (create_app);
+--app main:app targets another ASGI app instead.
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+import httpx
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+DISEASE = "Heart Disease"
+FEATURES = ["age", "blood_pressure", "cholesterol", "chest_pain"]
+PASSWORD = "load-test-password"
+# Safety net for chat sessions that never complete (e.g. a dataset with many questions)
+MAX_CHAT_TURNS = 30
+DEFAULT_MIX = "login=2,predict=5,chat=2,upload=1"
+
+
+def _use_scratch_environment() -> str:
+    """Points the database and on-disk caches at a temp dir; must run before the API modules are imported."""
+    scratch = tempfile.mkdtemp(prefix="load_test_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(scratch, 'load.db')}"
+    os.environ["RISK_MODEL_DIR"] = os.path.join(scratch, "risk_models")
+    os.environ["SIMILARITY_INDEX_DIR"] = os.path.join(scratch, "similarity")
+    os.environ["USER_CACHE_EPOCH_FILE"] = os.path.join(scratch, "user_cache_epoch")
+    return scratch
+
+
+def create_app():
+    """The real auth/predict/chat routers with migrations on startup, as served for load tests."""
+    if API_DIR not in sys.path:
+        sys.path.insert(0, API_DIR)
+    from fastapi import FastAPI
+
+    import auth
+    import chat
+    import endpoints
+    from database import engine
+    from metrics import install_metrics
+    from migrations import run_migrations
+    from profiling import install_profiling
+
+    @asynccontextmanager
+    async def lifespan(app):
+        run_migrations(engine, verbose=False)
+        yield
+
+    app = FastAPI(title="Disease Prediction API (load test)", lifespan=lifespan)
+    app.include_router(auth.router)
+    app.include_router(endpoints.router)
+    app.include_router(chat.router)
+    install_metrics(app)
+    install_profiling(app)
+
+    @app.get("/api/health")
+    def health():
+        return {"ok": True}
+
+    return app
+
+
+def _load_app(spec: str):
+    module_name, _, attr = spec.partition(":")
+    if API_DIR not in sys.path:
+        sys.path.insert(0, API_DIR)
+    return getattr(importlib.import_module(module_name), attr or "app")
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    # Nearest-rank percentile
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _summary(latencies: list[float], errors: int, seconds: float) -> dict:
+    values = sorted(latencies)
+    count = len(values)
+    return {
+        "requests": count,
+        "errors": errors,
+        "error_rate": round(errors / count, 4) if count else 0.0,
+        "throughput_rps": round(count / seconds, 2) if seconds else 0.0,
+        "p50_ms": round(_percentile(values, 50) * 1000, 2),
+        "p95_ms": round(_percentile(values, 95) * 1000, 2),
+        "p99_ms": round(_percentile(values, 99) * 1000, 2),
+        "mean_ms": round(sum(values) / count * 1000, 2) if count else 0.0,
+        "max_ms": round(values[-1] * 1000, 2) if count else 0.0,
+    }
+
+
+class Recorder:
+    """Times every request by a stable name ("POST /chat/{id}/message") and counts failures."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.error_samples = defaultdict(list)
+        self.scenarios = defaultdict(lambda: {"completed": 0, "failed": 0})
+
+    async def request(self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs) -> httpx.Response | None:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            self._record(name, time.perf_counter() - started, repr(e))
+            return None
+        error = None if response.status_code < 400 else f"{response.status_code} {response.text[:200]}"
+        self._record(name, time.perf_counter() - started, error)
+        return response if error is None else None
+
+    def _record(self, name: str, seconds: float, error: str | None) -> None:
+        self.latencies[name].append(seconds)
+        if error is not None:
+            self.errors[name] += 1
+            if len(self.error_samples[name]) < 3:
+                self.error_samples[name].append(error)
+
+    def report(self, seconds: float) -> dict:
+        all_latencies = [v for values in self.latencies.values() for v in values]
+        return {
+            "overall": _summary(all_latencies, sum(self.errors.values()), seconds),
+            "requests": {name: _summary(values, self.errors[name], seconds) for name, values in sorted(self.latencies.items())},
+            "scenarios": dict(self.scenarios),
+            "error_samples": {name: samples for name, samples in self.error_samples.items() if samples},
+        }
+
+
+class Fixtures:
+    """Accounts and payloads shared by all virtual users, created before the measured run."""
+
+    def __init__(self, upload_rows: int):
+        run_id = uuid.uuid4().hex[:8]
+        self.user_email = f"load-user-{run_id}@example.com"
+        self.admin_email = f"load-admin-{run_id}@example.com"
+        self.user_headers = {}
+        self.admin_headers = {}
+        self.csv = self._csv(upload_rows)
+
+    @staticmethod
+    def _csv(rows: int) -> bytes:
+        rng = random.Random(0)
+        lines = [",".join(FEATURES + ["target"])]
+        for _ in range(rows):
+            age = rng.randint(20, 85)
+            lines.append(f"{age},{rng.gauss(125, 15):.1f},{rng.gauss(210, 35):.1f},{rng.randint(0, 3)},{int(age > 55)}")
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+    async def setup(self, client: httpx.AsyncClient) -> None:
+        for email, role in ((self.user_email, "user"), (self.admin_email, "admin")):
+            response = await client.post("/auth/signup", json={"email": email, "password": PASSWORD, "full_name": "Load Test", "role": role})
+            response.raise_for_status()
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+            if role == "admin":
+                self.admin_headers = headers
+            else:
+                self.user_headers = headers
+        # The chat scenario needs a processed dataset for its disease
+        response = await client.post(
+            "/predict/upload_csv",
+            files={"file": ("heart.csv", self.csv, "text/csv")},
+            data={"disease_type": DISEASE},
+            headers=self.admin_headers,
+        )
+        response.raise_for_status()
+
+
+async def scenario_login(client, recorder: Recorder, fixtures: Fixtures, rng: random.Random) -> bool:
+    response = await recorder.request(
+        client, "POST /auth/login", "POST", "/auth/login",
+        params={"role": "user"}, data={"username": fixtures.user_email, "password": PASSWORD},
+    )
+    return response is not None
+
+
+async def scenario_predict(client, recorder: Recorder, fixtures: Fixtures, rng: random.Random) -> bool:
+    features = {"age": rng.randint(20, 85), "blood_pressure": rng.gauss(125, 15), "cholesterol": rng.gauss(210, 35), "bmi": rng.gauss(26, 4)}
+    response = await recorder.request(
+        client, "POST /predict/tabular", "POST", "/predict/tabular", json={"features": features, "disease_type": DISEASE}
+    )
+    return response is not None
+
+
+async def scenario_chat(client, recorder: Recorder, fixtures: Fixtures, rng: random.Random) -> bool:
+    response = await recorder.request(
+        client, "POST /chat/start", "POST", "/chat/start", params={"disease_context": DISEASE}, headers=fixtures.user_headers
+    )
+    if response is None:
+        return False
+    session_id = response.json()["session_id"]
+    for _ in range(MAX_CHAT_TURNS):
+        response = await recorder.request(
+            client, "POST /chat/{id}/message", "POST", f"/chat/{session_id}/message",
+            params={"content": str(rng.randint(1, 200))}, headers=fixtures.user_headers,
+        )
+        if response is None:
+            return False
+        if response.json().get("status") == "completed":
+            return True
+    return False
+
+
+async def scenario_upload(client, recorder: Recorder, fixtures: Fixtures, rng: random.Random) -> bool:
+    response = await recorder.request(
+        client, "POST /predict/upload_csv", "POST", "/predict/upload_csv",
+        files={"file": (f"heart_load_{uuid.uuid4().hex[:8]}.csv", fixtures.csv, "text/csv")},
+        data={"disease_type": DISEASE}, headers=fixtures.admin_headers,
+    )
+    return response is not None
+
+
+SCENARIOS = {
+    "login": scenario_login,
+    "predict": scenario_predict,
+    "chat": scenario_chat,
+    "upload": scenario_upload,
+}
+
+
+def parse_mix(text: str) -> dict[str, float]:
+    mix = {}
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"Unknown scenario '{name}' (choose from {', '.join(SCENARIOS)})")
+        mix[name] = float(weight or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise argparse.ArgumentTypeError("The mix needs at least one scenario with a positive weight")
+    return mix
+
+
+async def _virtual_user(index: int, client, recorder: Recorder, fixtures: Fixtures, mix: dict[str, float], deadline: float, iterations: int, seed: int) -> None:
+    rng = random.Random(seed + index)
+    names, weights = list(mix), list(mix.values())
+    done = 0
+    while time.perf_counter() < deadline and (not iterations or done < iterations):
+        name = rng.choices(names, weights)[0]
+        try:
+            ok = await SCENARIOS[name](client, recorder, fixtures, rng)
+        except Exception as e:
+            recorder._record(f"scenario {name}", 0.0, repr(e))
+            ok = False
+        recorder.scenarios[name]["completed" if ok else "failed"] += 1
+        done += 1
+
+
+async def run_load(client: httpx.AsyncClient, args) -> dict:
+    fixtures = Fixtures(args.upload_rows)
+    await fixtures.setup(client)
+
+    recorder = Recorder()
+    started = time.perf_counter()
+    deadline = started + args.duration if args.duration else float("inf")
+    await asyncio.gather(*(
+        _virtual_user(i, client, recorder, fixtures, args.mix, deadline, args.iterations, args.seed) for i in range(args.users)
+    ))
+    elapsed = time.perf_counter() - started
+    return {
+        "created_at": datetime.now().isoformat(),
+        "target": args.target,
+        "users": args.users,
+        "mix": args.mix,
+        "seconds": round(elapsed, 3),
+        **recorder.report(elapsed),
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _wait_until_healthy(base_url: str, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    async with httpx.AsyncClient(base_url=base_url, timeout=2) as client:
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+            try:
+                if (await client.get("/api/health")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.25)
+    raise RuntimeError("uvicorn did not become healthy in time")
+
+
+async def _main(args) -> dict:
+    if args.base_url:
+        args.target = args.base_url
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as client:
+            return await run_load(client, args)
+
+    scratch = _use_scratch_environment()
+    if args.uvicorn:
+        port = _free_port()
+        app_spec = ["load_test:create_app", "--factory", "--app-dir", SCRIPTS_DIR] if args.app is None else [args.app, "--app-dir", API_DIR]
+        command = [sys.executable, "-m", "uvicorn", *app_spec, "--host", "127.0.0.1", "--port", str(port), "--workers", str(args.workers), "--log-level", "warning"]
+        process = subprocess.Popen(command, cwd=API_DIR, env=os.environ.copy())
+        base_url = f"http://127.0.0.1:{port}"
+        args.target = f"uvicorn ({base_url}, {args.workers} worker(s), sqlite in {scratch})"
+        try:
+            await _wait_until_healthy(base_url, process)
+            async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=httpx.Limits(max_connections=args.users)) as client:
+                return await run_load(client, args)
+        finally:
+            process.terminate()
+            process.wait(timeout=10)
+
+    app = create_app() if args.app is None else _load_app(args.app)
+    args.target = f"in-process ({args.app or 'create_app'}, sqlite in {scratch})"
+    # Lifespan runs once and every request shares this event loop, as under uvicorn
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=args.timeout) as client:
+            return await run_load(client, args)
+
+
+def _print_report(report: dict) -> None:
+    print(f"\n{report['target']}: {report['users']} users, {report['seconds']}s")
+    print(f"{'request':<28} {'count':>7} {'err%':>6} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    rows = list(report["requests"].items()) + [("overall", report["overall"])]
+    for name, s in rows:
+        print(f"{name:<28} {s['requests']:>7} {s['error_rate'] * 100:>5.1f}% {s['throughput_rps']:>8.1f} {s['p50_ms']:>9.1f} {s['p95_ms']:>9.1f} {s['p99_ms']:>9.1f}")
+    for name, samples in report["error_samples"].items():
+        print(f"  {name}: {samples[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--base-url", help="Drive an already running server")
+    target.add_argument("--uvicorn", action="store_true", help="Start a local uvicorn on a temp SQLite database")
+    parser.add_argument("--app", help="ASGI app to serve as module:attr (default: the real routers from create_app)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes (--uvicorn only)")
+    parser.add_argument("--users", type=int, default=10, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run (0: only --iterations)")
+    parser.add_argument("--iterations", type=int, default=0, help="Scenarios per user (0: until --duration)")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f"Scenario weights (default {DEFAULT_MIX})")
+    parser.add_argument("--upload-rows", type=int, default=200, help="Rows in each uploaded CSV")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    args = parser.parse_args()
+    if not args.duration and not args.iterations:
+        parser.error("give --duration and/or --iterations")
+
+    report = asyncio.run(_main(args))
+    _print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 from database import SessionLocal
 from models import User, Dataset, PatientRecord, Prediction, ChatSession, ChatMessage
+from record_storage import count_records, dataset_storage_ids, uses_partitions
 
 def verify_empty():
     db = SessionLocal()
@@ -7,6 +8,9 @@ def verify_empty():
         users_count = db.query(User).count()
         datasets_count = db.query(Dataset).count()
         records_count = db.query(PatientRecord).count()
+        if not uses_partitions(db):
+            # SQLite keeps per-dataset tables outside patient_records
+            records_count += sum(count_records(db, dataset_id) for dataset_id in dataset_storage_ids(db))
         predictions_count = db.query(Prediction).count()
         sessions_count = db.query(ChatSession).count()
         messages_count = db.query(ChatMessage).count()
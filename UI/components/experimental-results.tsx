@@ -261,7 +261,19 @@ export default function ExperimentalResults({ allowRefresh = false }: { allowRef
     setIsRefreshing(true)
     try {
       const { experiments } = await import("@/lib/api")
-      const response = await experiments.regenerate()
+      const started = await experiments.regenerate()
+      let job = started.data
+      while (job.status === "queued" || job.status === "running") {
+        const done = job.completed_datasets?.length ?? 0
+        const total = job.datasets?.length ?? 0
+        setStatus(total ? `Regenerating metrics: ${done}/${total} datasets complete...` : "Regenerating metrics...")
+        await new Promise((resolve) => setTimeout(resolve, 2000))
+        job = (await experiments.getRegenerationStatus(job.job_id, job.last_event_seq)).data
+      }
+      if (job.status !== "succeeded") {
+        throw new Error(job.error || "Regeneration failed")
+      }
+      const response = await experiments.getResults()
       setData(response.data)
       setStatus(response.data.status || "Experimental results regenerated.")
     } catch (error) {
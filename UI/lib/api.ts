@@ -49,22 +49,37 @@ export const predict = {
     getUniqueDiseases: () => api.get<string[]>('/predict/datasets/unique-diseases'),
 };
 
+export interface Page<T> {
+    items: T[];
+    next_cursor: string | null;
+}
+
+export interface PageParams {
+    cursor?: string;
+    limit?: number;
+}
+
 export const chat = {
     start: (disease: string) => api.post('/chat/start', null, { params: { disease_context: disease } }),
     message: (sessionId: number, content: string) => api.post(`/chat/${sessionId}/message`, null, { params: { content } }),
-    getHistory: (sessionId: number) => api.get(`/chat/${sessionId}/history`),
+    submitAnswers: (sessionId: number, answers: Record<string, string | number>) => api.post(`/chat/${sessionId}/answers`, { answers }),
+    getHistory: (sessionId: number, params: PageParams = {}) =>
+        api.get<Page<{ id: number; sender: string; content: string; timestamp: string }>>(`/chat/${sessionId}/history`, { params }),
 };
 
 export const dashboard = {
     getAdminStats: () => api.get('/predict/dashboard/admin-stats'),
     listAdminUploads: () => api.get<{ filenames: string[] }>('/predict/dashboard/admin-uploads'),
     getUserStats: () => api.get('/predict/dashboard/user-stats'),
-    getHistory: () => api.get('/predict/predict/history'), // Note: router prefix is /predict, check nesting
+    getHistory: (params: PageParams & { include?: string } = {}) =>
+        api.get<Page<Record<string, any>>>('/predict/predict/history', { params }), // Note: router prefix is /predict, check nesting
 };
 
 export const experiments = {
     getResults: () => api.get('/predict/experimental-results'),
     regenerate: () => api.post('/predict/experimental-results/regenerate'),
+    getRegenerationStatus: (jobId: string, since = -1) =>
+        api.get(`/predict/experimental-results/regenerate/${jobId}`, { params: { since } }),
 };
 
 export default api;
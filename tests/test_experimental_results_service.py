@@ -0,0 +1,191 @@
+import json
+import os
+import sys
+
+import pytest
+
+API_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'API')
+if API_DIR not in sys.path:
+    sys.path.append(API_DIR)
+
+import experimental_results_service as service
+
+
+@pytest.fixture
+def results_file(tmp_path, monkeypatch):
+    generated = tmp_path / 'experimental_results.generated.json'
+    monkeypatch.setattr(service, 'GENERATED_RESULTS_PATH', generated)
+    monkeypatch.setattr(service, 'DEFAULT_RESULTS_PATH', tmp_path / 'experimental_results.json')
+    monkeypatch.setattr(service, 'RESULTS_CACHE_CHECK_SECONDS', 0.0)
+    service.invalidate_experimental_results_cache()
+    yield generated
+    service.invalidate_experimental_results_cache()
+
+
+def _write_payload(path, status):
+    payload = {
+        'status': status,
+        'performance': {'heart': {'label': 'Heart Disease', 'chaos': {'accuracy': float('nan')}}},
+        'dataset_overview': [{'name': 'Heart Disease', 'total': 10}],
+        'error_metrics': [],
+        'confusion_matrices': [],
+        'model_comparison': [],
+    }
+    path.write_text(json.dumps(payload), encoding='utf-8')
+
+
+# The sanitized payload is read once and reused until the file mtime changes.
+def test_load_experimental_results_is_cached_until_mtime_changes(results_file):
+    _write_payload(results_file, 'first')
+    first = service.load_experimental_results()
+
+    assert service.load_experimental_results() is first
+    assert first['performance']['heart']['chaos']['accuracy'] == 0.0
+
+    _write_payload(results_file, 'second')
+    stat = results_file.stat()
+    os.utime(results_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert service.load_experimental_results()['status'] == 'second'
+
+
+# Filtered admin views are memoized per allowed disease key set and dropped with the payload.
+def test_admin_views_are_memoized_by_allowed_keys(results_file):
+    _write_payload(results_file, 'base')
+    payload = service.load_experimental_results()
+
+    view = service.experimental_payload_for_admin_diseases(payload, ['Heart Disease'])
+    assert service.experimental_payload_for_admin_diseases(payload, ['heart', None]) is view
+    assert list(view['performance']) == ['heart']
+
+    service.invalidate_experimental_results_cache()
+    reloaded = service.load_experimental_results()
+    assert service.experimental_payload_for_admin_diseases(reloaded, ['Heart Disease']) is not view
+
+
+# Regeneration only re-evaluates datasets whose content hash changed.
+def test_generate_reuses_sections_with_unchanged_hashes(results_file, tmp_path, monkeypatch):
+    sources = {}
+    for key in ('heart', 'lung'):
+        sources[key] = tmp_path / f'{key}.csv'
+        sources[key].write_text('a,target\n1,0\n2,1\n', encoding='utf-8')
+    evaluated = []
+
+    def fake_evaluate(key, path, seed, events=None):
+        evaluated.append(key)
+        label = service.DATASET_LABELS[key]
+        return {
+            'overview': {'name': label, 'total': 2},
+            'performance': {'label': label, 'baseline': {}, 'chaos': {}},
+            'error_metrics': {'name': label},
+            'confusion_matrix': {'name': label},
+            'model_comparison': None,
+        }
+
+    monkeypatch.setattr(service, '_find_candidate_datasets', lambda: dict(sources))
+    monkeypatch.setattr(service, '_evaluate_dataset', fake_evaluate)
+    monkeypatch.setattr(service, 'RESULTS_WORKERS', 1)
+
+    first = service.generate_experimental_results()
+    assert sorted(evaluated) == ['heart', 'lung']
+    assert 'sections' not in first
+    assert 'sections' not in service.load_experimental_results()
+
+    evaluated.clear()
+    sources['lung'].write_text('a,target\n1,0\n3,1\n', encoding='utf-8')
+    second = service.generate_experimental_results()
+
+    assert evaluated == ['lung']
+    assert list(second['performance']) == ['heart', 'lung']
+    assert '1 recomputed, 1 reused' in second['status']
+
+
+
+# SSE clients pass the last seq they sent; waiting again with it must block (on the event loop,
+# not a threadpool thread) until a new event arrives from the job thread, not replay that event.
+def test_wait_for_events_blocks_until_an_event_after_the_last_seen_one():
+    import asyncio
+    import threading
+    import time
+    from experimental_results_jobs import RegenerationJob
+
+    job = RegenerationJob()
+    job.record({'type': 'started', 'datasets': ['a'], 'trials': 1})
+    job.record({'type': 'trial', 'dataset': 'a', 'trial': 1})
+
+    async def scenario():
+        assert [e['seq'] for e in await job.wait_for_events(-1, 0.5)] == [0, 1]
+        started = time.perf_counter()
+        assert await job.wait_for_events(1, 0.3) == []
+        assert time.perf_counter() - started >= 0.25
+
+        threading.Timer(0.1, job.record, args=({'type': 'dataset_finished', 'dataset': 'a'},)).start()
+        started = time.perf_counter()
+        assert [e['seq'] for e in await job.wait_for_events(1, 5.0)] == [2]
+        assert time.perf_counter() - started < 2.0
+        assert job._waiters == set()
+
+    asyncio.run(scenario())
+
+
+# A client that sees the job finished must already find its succeeded/failed event (SSE sends it before "end").
+def test_job_is_never_done_before_its_terminal_event(monkeypatch):
+    import experimental_results_jobs as jobs
+
+    seen = []
+
+    class CheckedJob(jobs.RegenerationJob):
+        def record(self, event, *args, **kwargs):
+            # What a concurrent reader could observe right before this event lands
+            seen.append((self.done, event['type']))
+            super().record(event, *args, **kwargs)
+
+    def fake_generate(progress):
+        progress({'type': 'trial', 'dataset': 'a', 'trial': 1})
+        return {'status': 'ok'}
+
+    def failing_generate(progress):
+        raise RuntimeError('boom')
+
+    for generate, terminal in ((fake_generate, 'succeeded'), (failing_generate, 'failed')):
+        monkeypatch.setattr(jobs, '_generate_profiled', generate)
+        seen.clear()
+        job = CheckedJob()
+        job.run()
+        assert job.done and job.status == terminal
+        assert job.events_since(0)[-1]['type'] == terminal
+        assert not any(done for done, _type in seen)
+
+def _threshold_fold(params, X_train, y_train, X_valid, y_valid, seed):
+    # Module level so the spawned KFoldEvaluator workers can unpickle it
+    return float(((X_valid[:, 0] > params['threshold']) == y_valid).mean())
+
+
+# Chaos trials scored by K-fold CV report mean and variance and end up in the optimizer history.
+def test_kfold_evaluator_scores_chaos_trials_from_shared_memory():
+    import numpy as np
+    from ml.chaos_optimizer import ChaosOptimizer
+    from ml.kfold import KFoldEvaluator
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(120, 3))
+    y = (X[:, 0] > 0).astype(int)
+
+    with KFoldEvaluator(_threshold_fold, X, y, n_splits=4, workers=2) as evaluate:
+        exact = evaluate({'threshold': 0.0})
+        assert exact['mean'] == 1.0 and exact['variance'] == 0.0
+        assert len(exact['fold_scores']) == 4
+
+        optimizer = ChaosOptimizer(n_iterations=3)
+        optimizer.map_to_hyperparameters = lambda x: {'threshold': x - 0.5}
+        best_params, best_score = optimizer.optimize(evaluate, x0=0.3)
+
+    assert [trial['iteration'] for trial in optimizer.history] == [1, 2, 3]
+    assert all(trial['variance'] is not None for trial in optimizer.history)
+    assert best_score == max(trial['score'] for trial in optimizer.history)
+    assert evaluate._blocks == []
+
+    # workers=1 (inside a per-dataset worker) scores the same folds serially, without a pool
+    with KFoldEvaluator(_threshold_fold, X, y, n_splits=4, workers=1) as serial:
+        assert serial._pool is None and serial._blocks == []
+        assert serial({'threshold': 0.0}) == exact
@@ -0,0 +1,56 @@
+import os
+import sys
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+API_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'API')
+if API_DIR not in sys.path:
+    sys.path.append(API_DIR)
+
+import metrics
+from auth import create_access_token
+from metrics import install_metrics, registry, stage_timer
+
+
+def _client():
+    app = FastAPI()
+
+    @app.get('/items/{item_id}')
+    def get_item(item_id: int):
+        with stage_timer('get_item', 'lookup'):
+            return {'id': item_id}
+
+    install_metrics(app)
+    registry.reset()
+    return TestClient(app)
+
+
+# Requests are labelled by route template and exported as cumulative Prometheus histograms.
+def test_metrics_endpoint_exports_route_histograms_and_stages():
+    client = _client()
+    for item_id in (1, 2, 3):
+        assert client.get(f'/items/{item_id}').status_code == 200
+    client.get('/missing')
+
+    admin = {'Authorization': f"Bearer {create_access_token({'sub': 'admin@example.com', 'role': 'admin', 'id': 1})}"}
+    body = client.get('/metrics', headers=admin).text
+    assert 'http_request_duration_seconds_count{method="GET",route="/items/{item_id}",status="200"} 3' in body
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/items/{item_id}",status="200",le="+Inf"} 3' in body
+    assert 'route="<unmatched>",status="404"' in body
+    assert 'http_response_size_bytes_sum{method="GET",route="/items/{item_id}"} 24' in body
+    assert 'http_requests_in_flight{method="GET"} 1' in body
+    assert 'stage_duration_seconds_count{operation="get_item",stage="lookup"} 3' in body
+    assert '/items/1' not in body
+
+
+# /metrics is only served to the configured scraper token or an admin access token.
+def test_metrics_endpoint_requires_scrape_token_or_admin(monkeypatch):
+    monkeypatch.setattr(metrics, 'METRICS_TOKEN', 'scrape-secret')
+    client = _client()
+    user = create_access_token({'sub': 'user@example.com', 'role': 'user', 'id': 2})
+
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    assert client.get('/metrics', headers={'Authorization': f'Bearer {user}'}).status_code == 403
+    assert client.get('/metrics', headers={'Authorization': 'Bearer scrape-secret'}).status_code == 200
@@ -0,0 +1,88 @@
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+API_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'API')
+if API_DIR not in sys.path:
+    sys.path.append(API_DIR)
+
+from migrations import applied_versions, discover_migrations, run_migrations
+from record_storage import count_records, dataset_storage_ids, drop_dataset_storage, load_records
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    run_migrations(engine, verbose=False)
+    yield engine
+    engine.dispose()
+
+
+def _plan(engine, sql, **params):
+    with engine.connect() as conn:
+        rows = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params).all()
+    return " | ".join(row[-1] for row in rows)
+
+
+def test_migrations_apply_once_and_record_versions(engine):
+    assert run_migrations(engine, verbose=False) == []
+    with engine.connect() as conn:
+        assert applied_versions(conn) == {m.VERSION for m in discover_migrations()}
+        assert 'metadata_info' in {c['name'] for c in inspect(conn).get_columns('datasets')}
+
+
+def test_record_storage_migration_splits_rows_per_dataset(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    run_migrations(engine, target=3, verbose=False)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO datasets (id, filename) VALUES (1, 'a.csv'), (2, 'b.csv')"))
+        for i in range(5):
+            conn.execute(
+                text("INSERT INTO patient_records (dataset_id, data) VALUES (:d, :data)"),
+                {"d": 1 if i < 3 else 2, "data": f'{{"row": {i}}}'},
+            )
+
+    run_migrations(engine, verbose=False)
+    with engine.begin() as conn:
+        assert dataset_storage_ids(conn) == [1, 2]
+        assert conn.execute(text("SELECT count(*) FROM patient_records")).scalar() == 0
+        assert dict(conn.execute(text("SELECT id, record_count FROM datasets")).all()) == {1: 3, 2: 2}
+        assert load_records(conn, 1) == [{"row": 0}, {"row": 1}, {"row": 2}]
+        drop_dataset_storage(conn, 2)
+        assert dataset_storage_ids(conn) == [1]
+        assert count_records(conn, 2) == 0
+    engine.dispose()
+
+
+@pytest.mark.parametrize(
+    'sql, index',
+    [
+        ('SELECT count(id) FROM patient_records WHERE dataset_id = :v', 'ix_patient_records_dataset_id'),
+        (
+            'SELECT id, sender, content, timestamp FROM chat_messages WHERE session_id = :v '
+            'ORDER BY timestamp, id LIMIT 51',
+            'ix_chat_messages_session_timestamp_id',
+        ),
+        (
+            'SELECT id, timestamp, risk_scores FROM predictions WHERE user_id = :v '
+            'ORDER BY timestamp DESC, id DESC LIMIT 51',
+            'ix_predictions_user_timestamp_id',
+        ),
+        (
+            'SELECT disease_type, count(id), count(risk_score), sum(risk_score), max(risk_score), max(timestamp) '
+            'FROM predictions WHERE user_id = :v GROUP BY disease_type',
+            'ix_predictions_user_disease_stats',
+        ),
+        (
+            'SELECT filename FROM datasets WHERE user_id = :v ORDER BY upload_date DESC',
+            'ix_datasets_user_upload_date',
+        ),
+    ],
+)
+def test_dashboard_and_history_queries_use_indexes(engine, sql, index):
+    plan = _plan(engine, sql, v=1)
+    assert index in plan
+    # Served in index order: no separate sort step
+    assert 'TEMP B-TREE' not in plan
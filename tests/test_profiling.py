@@ -0,0 +1,55 @@
+import os
+import sys
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+API_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'API')
+if API_DIR not in sys.path:
+    sys.path.append(API_DIR)
+
+import profiling
+from auth import create_access_token
+
+
+def _client():
+    app = FastAPI()
+
+    @app.get('/work')
+    @profiling.profiled('work')
+    def work():
+        time.sleep(0.05)
+        return {'ok': True}
+
+    @app.get('/plain')
+    def plain():
+        return {'ok': True}
+
+    profiling.install_profiling(app)
+    return TestClient(app)
+
+
+def _headers(role):
+    return {'Authorization': f"Bearer {create_access_token({'sub': f'{role}@example.com', 'role': role, 'id': 1})}", 'X-Profile': '1'}
+
+
+# Only admins can ask for a profile, X-Profile-Id only names files that exist, and old profiles
+# are rotated out beyond PROFILE_MAX_FILES.
+def test_profile_header_is_admin_only_and_profiles_rotate(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, 'PROFILE_DIR', str(tmp_path))
+    monkeypatch.setattr(profiling, 'PROFILE_MAX_FILES', 2)
+    client = _client()
+
+    response = client.get('/work', headers=_headers('user'))
+    assert response.status_code == 200 and 'x-profile-id' not in response.headers
+    assert os.listdir(tmp_path) == []
+
+    response = client.get('/plain', headers=_headers('admin'))
+    assert response.status_code == 200 and 'x-profile-id' not in response.headers
+
+    ids = [client.get('/work', headers=_headers('admin')).headers['x-profile-id'] for _ in range(3)]
+    files = sorted(os.listdir(tmp_path))
+    assert len(files) == 2 and files[0].endswith('.folded')
+    assert not any(ids[0] in name for name in files)
+    assert 'work' in (tmp_path / files[-1]).read_text()
@@ -0,0 +1,48 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+API_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'API')
+if API_DIR not in sys.path:
+    sys.path.append(API_DIR)
+
+import chat
+from auth import Principal, get_current_principal
+from chat_state import SessionState
+from database import get_async_db
+from ml import similarity_index
+
+
+# A plain user chatting against an admin's dataset only gets a summary of the neighbours, never their rows.
+def test_chat_similar_patients_never_returns_raw_rows_to_users(tmp_path, monkeypatch):
+    monkeypatch.setattr(similarity_index, 'SIMILARITY_INDEX_DIR', str(tmp_path))
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'age': rng.integers(20, 80, 40), 'cholesterol': rng.normal(200, 30, 40)})
+    df['target'] = (df['age'] > 50).astype(int)
+    similarity_index.build_similarity_index(7, df, 'target')
+
+    state = SessionState(1, 2, 7, 'Heart Disease', 'active', {'collected_data': {'age': 60}, 'missing_features': ['cholesterol']})
+
+    async def fake_get(db, session_id, user_id):
+        return state if session_id == 1 and user_id == 2 else None
+
+    async def no_db():
+        yield None
+
+    monkeypatch.setattr(chat.session_store, 'get', fake_get)
+    app = FastAPI()
+    app.include_router(chat.router)
+    app.dependency_overrides[get_current_principal] = lambda: Principal(2, 'user@example.com', 'user')
+    app.dependency_overrides[get_async_db] = no_db
+
+    body = TestClient(app).get('/chat/1/similar', params={'k': 1}).json()
+    assert 'similar_patients' not in body
+    summary = body['summary']
+    assert summary['neighbours'] == similarity_index.SUMMARY_MIN_NEIGHBOURS
+    assert sum(summary['outcomes'].values()) == summary['neighbours']
+    assert set(summary['mean_feature_deltas']) == {'age'}
+    assert 'features' not in str(body) and 'cholesterol' not in str(body)
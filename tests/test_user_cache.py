@@ -0,0 +1,50 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+API_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'API')
+if API_DIR not in sys.path:
+    sys.path.append(API_DIR)
+
+import auth
+from auth import UserCache
+
+
+class FakeUsers:
+    """Stands in for the AsyncSession: answers the (id, email, role) lookup from a dict and counts queries."""
+
+    def __init__(self, users):
+        self.users = users
+        self.queries = 0
+
+    async def execute(self, stmt):
+        self.queries += 1
+        email = stmt.whereclause.right.value
+        row = self.users.get(email)
+        return SimpleNamespace(first=lambda: SimpleNamespace(**row) if row else None)
+
+
+# A promotion or deletion done in another process (create_admin.py) reaches this worker's cache.
+def test_user_cache_serves_hits_and_sees_invalidation_from_other_processes(tmp_path, monkeypatch):
+    monkeypatch.setattr(auth, 'USER_CACHE_EPOCH_CHECK_SECONDS', 0)
+    epoch_file = str(tmp_path / 'epoch')
+    worker = UserCache(ttl_seconds=60, max_entries=8, epoch_file=epoch_file)
+    db = FakeUsers({'a@example.com': {'id': 1, 'email': 'a@example.com', 'role': 'user'}})
+
+    async def role():
+        principal = await worker.get(db, 'a@example.com')
+        return principal.role if principal else None
+
+    assert asyncio.run(role()) == 'user'
+    assert asyncio.run(role()) == 'user'
+    assert db.queries == 1
+
+    db.users['a@example.com']['role'] = 'admin'
+    UserCache(epoch_file=epoch_file).invalidate('a@example.com')
+    assert asyncio.run(role()) == 'admin'
+
+    del db.users['a@example.com']
+    UserCache(epoch_file=epoch_file).invalidate()
+    assert asyncio.run(role()) is None
+    assert db.queries == 3